@@ -61,6 +61,19 @@ def analyze_text():
     result = text_classifier.analyze(data['text'])
     return jsonify(result)
 
+@app.route('/analyze/text/batch', methods=['POST'])
+def analyze_text_batch():
+    """Analyze a batch of texts in one model pass"""
+    if not text_classifier:
+        return jsonify({"error": "Text classification model not available"}), 503
+
+    data = request.get_json()
+    if not data or not isinstance(data.get('texts'), list):
+        return jsonify({"error": "No texts provided"}), 400
+
+    results = text_classifier.analyze_batch(data['texts'])
+    return jsonify({"results": results})
+
 @app.route('/analyze/image', methods=['POST'])
 def analyze_image():
     """Analyze image for unsafe content"""
@@ -80,6 +93,19 @@ def analyze_image():
         
     return jsonify({"error": "No image provided"}), 400
 
+@app.route('/analyze/image/batch', methods=['POST'])
+def analyze_image_batch():
+    """Analyze a batch of base64 images in one model pass"""
+    if not image_classifier:
+        return jsonify({"error": "Image classification model not available"}), 503
+
+    data = request.get_json()
+    if not data or not isinstance(data.get('images_base64'), list):
+        return jsonify({"error": "No images provided"}), 400
+
+    results = image_classifier.analyze_base64_batch(data['images_base64'])
+    return jsonify({"results": results})
+
 @app.route('/analyze/url', methods=['POST'])
 def analyze_url():
     """Analyze URL for malicious content"""
@@ -93,6 +119,19 @@ def analyze_url():
     result = url_classifier.analyze(data['url'])
     return jsonify(result)
 
+@app.route('/analyze/url/batch', methods=['POST'])
+def analyze_url_batch():
+    """Analyze a batch of URLs in one model pass"""
+    if not url_classifier:
+        return jsonify({"error": "URL classification model not available"}), 503
+
+    data = request.get_json()
+    if not data or not isinstance(data.get('urls'), list):
+        return jsonify({"error": "No URLs provided"}), 400
+
+    results = url_classifier.analyze_batch(data['urls'])
+    return jsonify({"results": results})
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5001))
     app.run(host='0.0.0.0', port=port, debug=True)
@@ -0,0 +1,100 @@
+"""
+Shared stratified-split core for the WebSafety dataset splitters.
+
+The three splitter entrypoints only differ in how they key a sample
+(by primary_label, or by (language, primary_label)) and where the files
+live; the grouping, shuffling and split-point arithmetic live here once.
+"""
+
+from typing import Iterable, Tuple
+
+import numpy as np
+
+
+def _split_bounds_kernel(counts, train_ratio, val_ratio):
+    """Per-group train/val end offsets from group sizes and ratios"""
+    train_end = (counts * train_ratio).astype(np.int64)
+    val_end = train_end + (counts * val_ratio).astype(np.int64)
+    return train_end, val_end
+
+try:
+    # Optional numba JIT strips interpreter overhead from the split-point
+    # arithmetic for very large group counts. No cache=True: the on-disk
+    # cache keys on the module identity, and this file is importable both
+    # as processing._split_core and as bare _split_core (script runs), so
+    # a cache written under one identity crashes loads under the other.
+    from numba import njit
+    compute_split_bounds = njit(_split_bounds_kernel)
+except ImportError:
+    compute_split_bounds = _split_bounds_kernel
+
+# One seeded generator shared by callers that don't manage their own state
+shared_rng = np.random.default_rng(42)
+
+
+def split(rows: Iterable[Tuple[str, bytes]],
+          train_ratio: float = 0.7,
+          val_ratio: float = 0.15,
+          seed=42,
+          rng=None,
+          return_stats: bool = False):
+    """
+    Stratified split of (key, raw_line) pairs into three lists of raw lines.
+
+    Group ids come from np.unique, a stable argsort lays each key group out
+    as a contiguous slice of one index array, and per-group shuffles plus
+    train/val carving operate on those slices. Pass an existing numpy
+    Generator as rng to share state; otherwise one is seeded from `seed`,
+    or the module-level shared_rng is used when seed is None.
+
+    With return_stats=True a fourth value is returned: per-split
+    {key: count} dicts, computed from the split bounds so callers can
+    report distributions without re-scanning rows.
+    """
+    keys = []
+    lines = []
+    for key, line in rows:
+        keys.append(key)
+        lines.append(line)
+
+    if rng is None:
+        rng = shared_rng if seed is None else np.random.default_rng(seed)
+
+    # Object array over the lines lets the final gather use C-level fancy
+    # indexing instead of a Python loop per sample
+    lines = np.asarray(lines, dtype=object)
+
+    uniques, inverse, counts = np.unique(np.asarray(keys), return_inverse=True, return_counts=True)
+    order = np.argsort(inverse, kind='stable')
+
+    train_ends, val_ends = compute_split_bounds(counts, train_ratio, val_ratio)
+
+    train_idx, val_idx, test_idx = [], [], []
+    start = 0
+    for i, count in enumerate(counts):
+        group = order[start:start + count]
+        rng.shuffle(group)
+
+        train_idx.append(group[:train_ends[i]])
+        val_idx.append(group[train_ends[i]:val_ends[i]])
+        test_idx.append(group[val_ends[i]:])
+        start += count
+
+    def gather(chunks):
+        # Shuffle the final split as an index array, emit in permuted order
+        idx = np.concatenate(chunks) if chunks else np.empty(0, dtype=np.intp)
+        rng.shuffle(idx)
+        return lines[idx].tolist()
+
+    train, val, test = gather(train_idx), gather(val_idx), gather(test_idx)
+
+    if return_stats:
+        train_counts, val_counts, test_counts = {}, {}, {}
+        for i, key in enumerate(uniques):
+            key = str(key)
+            train_counts[key] = int(train_ends[i])
+            val_counts[key] = int(val_ends[i] - train_ends[i])
+            test_counts[key] = int(counts[i] - val_ends[i])
+        return train, val, test, (train_counts, val_counts, test_counts)
+
+    return train, val, test
@@ -3,65 +3,67 @@ Dataset Splitter - Creates train/validation/test splits
 Splits 9K dataset into 70% train, 15% validation, 15% test
 """
 
-import json
-import random
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from collections import defaultdict
 
-def load_dataset(file_path):
-    """Load JSONL dataset"""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        return [json.loads(line) for line in f]
+import orjson
 
-def stratified_split(samples, train_ratio=0.7, val_ratio=0.15, test_ratio=0.15):
+try:
+    from ._split_core import split as _core_split
+except ImportError:  # run directly as a script, not as a package module
+    from _split_core import split as _core_split
+
+# 64KB I/O buffer - cuts read/write syscalls vs the default 8KB
+BUFFER_SIZE = 65536
+
+def iter_dataset(file_path):
+    """Stream (language, primary_label, raw_line) tuples from a JSONL file
+
+    Only the two stratification keys are parsed; the raw line bytes are
+    kept as-is so splits can be written back without re-serializing.
+    """
+    with open(file_path, 'rb', buffering=BUFFER_SIZE) as f:
+        for line in f:
+            if line.strip():
+                obj = orjson.loads(line)
+                yield obj['language'], obj['primary_label'], line
+
+def stratified_split(rows, train_ratio=0.7, val_ratio=0.15, test_ratio=0.15, seed=42,
+                     return_stats=False):
     """
     Stratified split ensuring balanced distribution across:
     - Languages
     - Categories
+
+    Takes an iterable of (language, primary_label, raw_line) tuples and
+    returns three lists of raw JSONL lines.
     """
-    # Group by (language, category)
-    groups = defaultdict(list)
-    for sample in samples:
-        key = (sample['language'], sample['primary_label'])
-        groups[key].append(sample)
-    
-    train, val, test = [], [], []
-    
-    # Split each group proportionally
-    for key, group_samples in groups.items():
-        random.shuffle(group_samples)
-        n = len(group_samples)
-        
-        train_end = int(n * train_ratio)
-        val_end = train_end + int(n * val_ratio)
-        
-        train.extend(group_samples[:train_end])
-        val.extend(group_samples[train_end:val_end])
-        test.extend(group_samples[val_end:])
-    
-    # Shuffle final sets
-    random.shuffle(train)
-    random.shuffle(val)
-    random.shuffle(test)
-    
-    return train, val, test
-
-def save_jsonl(samples, file_path):
-    """Save to JSONL"""
-    with open(file_path, 'w', encoding='utf-8') as f:
-        for sample in samples:
-            f.write(json.dumps(sample, ensure_ascii=False) + '\n')
-
-def print_stats(name, samples):
-    """Print statistics for a split"""
-    total = len(samples)
+    keyed = ((language + '|' + label, line) for language, label, line in rows)
+    return _core_split(keyed, train_ratio, val_ratio, seed=seed, return_stats=return_stats)
+
+def save_jsonl(lines, file_path):
+    """Save raw JSONL lines, one write per ~1MB chunk instead of per row"""
+    with open(file_path, 'wb', buffering=BUFFER_SIZE) as f:
+        buf = bytearray()
+        for line in lines:
+            buf += line
+            if len(buf) > 1 << 20:
+                f.write(buf)
+                buf.clear()
+        if buf:
+            f.write(buf)
+
+def print_stats(name, total, key_counts):
+    """Print statistics for a split from its per-group counts (no row scan)"""
     langs = defaultdict(int)
     cats = defaultdict(int)
-    
-    for s in samples:
-        langs[s['language']] += 1
-        cats[s['primary_label']] += 1
-    
+
+    for key, count in key_counts.items():
+        language, label = key.split('|', 1)
+        langs[language] += count
+        cats[label] += count
+
     print(f"\n{name}: {total} samples")
     print("  Languages:", {k: v for k, v in sorted(langs.items())})
     print("  Categories:", {k: v for k, v in sorted(cats.items())})
@@ -69,36 +71,37 @@ def print_stats(name, samples):
 def split_dataset():
     """Main splitting function"""
     print("🔀 Splitting 9K dataset into train/val/test")
-    
+
     # Paths
     base = Path(__file__).parent.parent
     input_file = base / "raw" / "websafety_9k_multilingual.jsonl"
     output_dir = base / "processed"
     output_dir.mkdir(exist_ok=True)
-    
-    # Load
+
+    # Load + split in one streaming pass (seeded for reproducibility)
     print(f"\n📂 Loading from: {input_file}")
-    samples = load_dataset(input_file)
-    print(f"   Total samples: {len(samples):,}")
-    
-    # Set seed for reproducibility
-    random.seed(42)
-    
-    # Split
     print("\n✂️  Splitting with stratification...")
-    train, val, test = stratified_split(samples)
-    
+    train, val, test, stats = stratified_split(iter_dataset(input_file), return_stats=True)
+    print(f"   Total samples: {len(train) + len(val) + len(test):,}")
+
     # Stats
-    print_stats("Training", train)
-    print_stats("Validation", val)
-    print_stats("Test", test)
-    
-    # Save
+    print_stats("Training", len(train), stats[0])
+    print_stats("Validation", len(val), stats[1])
+    print_stats("Test", len(test), stats[2])
+
+    # Save - the three writes are independent, so overlap them
+    # (f.write releases the GIL while the kernel copies the buffer)
     print("\n💾 Saving splits...")
-    save_jsonl(train, output_dir / "train_9k.jsonl")
-    save_jsonl(val, output_dir / "validation_9k.jsonl")
-    save_jsonl(test, output_dir / "test_9k.jsonl")
-    
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        writes = [
+            pool.submit(save_jsonl, train, output_dir / "train_9k.jsonl"),
+            pool.submit(save_jsonl, val, output_dir / "validation_9k.jsonl"),
+            pool.submit(save_jsonl, test, output_dir / "test_9k.jsonl"),
+        ]
+        # Surface writer errors - an unobserved future swallows them
+        for w in writes:
+            w.result()
+
     print(f"\n✅ Splits saved to: {output_dir}")
     print(f"   - train_9k.jsonl: {len(train):,} samples")
     print(f"   - validation_9k.jsonl: {len(val):,} samples")
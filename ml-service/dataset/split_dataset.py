@@ -1,63 +1,49 @@
 """
 Split dataset into train/validation/test sets
 """
-import json
-import random
-from collections import defaultdict
 import os
 
+import orjson
+
+try:
+    from .processing._split_core import split as _core_split
+except ImportError:  # run directly as a script, not as a package module
+    from processing._split_core import split as _core_split
+
+# 64KB I/O buffer - cuts read/write syscalls vs the default 8KB
+BUFFER_SIZE = 65536
+
 def split_dataset(input_file, output_dir, train_ratio=0.7, val_ratio=0.15, test_ratio=0.15):
     """Split dataset with stratification"""
-    
+
     print("Loading dataset...")
-    samples = []
-    with open(input_file, 'r', encoding='utf-8') as f:
-        for line in f:
-            samples.append(json.loads(line))
-    
-    print(f"Loaded {len(samples)} samples")
-    
-    # Group by label
-    label_groups = defaultdict(list)
-    for sample in samples:
-        label = sample['primary_label']
-        label_groups[label].append(sample)
-    
-    train_samples = []
-    val_samples = []
-    test_samples = []
-    
-    # Split each group
-    for label, group in label_groups.items():
-        random.shuffle(group)
-        n = len(group)
-        train_end = int(n * train_ratio)
-        val_end = train_end + int(n * val_ratio)
-        
-        train_samples.extend(group[:train_end])
-        val_samples.extend(group[train_end:val_end])
-        test_samples.extend(group[val_end:])
-    
-    # Shuffle final splits
-    random.shuffle(train_samples)
-    random.shuffle(val_samples)
-    random.shuffle(test_samples)
-    
+    # Stream (label, raw_line) pairs - only the label is parsed, lines are
+    # written back untouched so no re-serialization
+    def iter_rows():
+        with open(input_file, 'rb', buffering=BUFFER_SIZE) as f:
+            for line in f:
+                if line.strip():
+                    yield orjson.loads(line)['primary_label'], line
+
+    train_samples, val_samples, test_samples = _core_split(
+        iter_rows(), train_ratio, val_ratio, seed=None
+    )
+
+    print(f"Loaded {len(train_samples) + len(val_samples) + len(test_samples)} samples")
+
     # Save splits
     os.makedirs(output_dir, exist_ok=True)
-    
-    with open(f"{output_dir}/train.jsonl", 'w', encoding='utf-8') as f:
-        for sample in train_samples:
-            f.write(json.dumps(sample, ensure_ascii=False) + '\n')
-    
-    with open(f"{output_dir}/validation.jsonl", 'w', encoding='utf-8') as f:
-        for sample in val_samples:
-            f.write(json.dumps(sample, ensure_ascii=False) + '\n')
-    
-    with open(f"{output_dir}/test.jsonl", 'w', encoding='utf-8') as f:
-        for sample in test_samples:
-            f.write(json.dumps(sample, ensure_ascii=False) + '\n')
-    
+
+    # One write per split - the blob is a few MB at most
+    with open(f"{output_dir}/train.jsonl", 'wb') as f:
+        f.write(b"".join(train_samples))
+
+    with open(f"{output_dir}/validation.jsonl", 'wb') as f:
+        f.write(b"".join(val_samples))
+
+    with open(f"{output_dir}/test.jsonl", 'wb') as f:
+        f.write(b"".join(test_samples))
+
     print(f"\n✓ Train: {len(train_samples)} samples")
     print(f"✓ Validation: {len(val_samples)} samples")
     print(f"✓ Test: {len(test_samples)} samples")
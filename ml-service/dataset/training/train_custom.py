@@ -12,14 +12,16 @@ Usage:
 """
 
 import json
+import orjson
 import os
 import argparse
 from typing import List, Dict
 import torch
-from torch.utils.data import Dataset, DataLoader
+from torch.utils.data import Dataset, DataLoader, IterableDataset, get_worker_info
 from transformers import (
     AutoTokenizer,
     AutoModelForSequenceClassification,
+    DataCollatorWithPadding,
     TrainingArguments,
     Trainer,
     EarlyStoppingCallback
@@ -28,60 +30,127 @@ from sklearn.metrics import accuracy_score, precision_recall_fscore_support, cla
 import numpy as np
 
 
+# Label mapping shared by both dataset variants
+LABEL2ID = {
+    'safe': 0,
+    'phishing': 1,
+    'malware': 2,
+    'hate_speech': 3,
+    'cyberbullying': 4,
+    'sexual_content': 5,
+    'violence': 6
+}
+
+
 class WebSafetyDataset(Dataset):
-    """PyTorch Dataset for WebSafety data"""
-    
+    """PyTorch Dataset for WebSafety data
+
+    Tokenizes everything once in a single batched call at load time, so
+    __getitem__ is a pure tensor slice instead of a per-sample tokenizer
+    call repeated every epoch.
+    """
+
     def __init__(self, filepath: str, tokenizer, max_length=512):
-        self.samples = []
         self.tokenizer = tokenizer
         self.max_length = max_length
-        
-        # Load samples
-        with open(filepath, 'r', encoding='utf-8') as f:
-            for line in f:
-                self.samples.append(json.loads(line))
-        
+
         # Create label mapping
-        self.label2id = {
-            'safe': 0,
-            'phishing': 1,
-            'malware': 2,
-            'hate_speech': 3,
-            'cyberbullying': 4,
-            'sexual_content': 5,
-            'violence': 6
-        }
+        self.label2id = LABEL2ID
         self.id2label = {v: k for k, v in self.label2id.items()}
-    
-    def __len__(self):
-        return len(self.samples)
-    
-    def __getitem__(self, idx):
-        sample = self.samples[idx]
-        text = sample['text']
-        label = self.label2id[sample['primary_label']]
-        
-        # Tokenize
+
+        # Load samples
+        texts = []
+        labels = []
+        with open(filepath, 'rb') as f:
+            for line in f:
+                sample = orjson.loads(line)
+                texts.append(sample['text'])
+                labels.append(self.label2id[sample['primary_label']])
+
+        # Tokenize up front - one batched call into the fast tokenizer.
+        # No padding here: the per-batch collator pads dynamically, so
+        # attention only ever covers the longest sequence in a batch.
         encoding = self.tokenizer(
-            text,
+            texts,
             max_length=self.max_length,
-            padding='max_length',
-            truncation=True,
-            return_tensors='pt'
+            truncation=True
         )
-        
+        self.input_ids = encoding['input_ids']
+        self.attention_mask = encoding['attention_mask']
+        # int8 array instead of a list of boxed ints - 7 classes fit
+        self.labels = np.asarray(labels, dtype=np.int8)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __getitem__(self, idx):
         return {
-            'input_ids': encoding['input_ids'].flatten(),
-            'attention_mask': encoding['attention_mask'].flatten(),
-            'labels': torch.tensor(label, dtype=torch.long)
+            'input_ids': self.input_ids[idx],
+            'attention_mask': self.attention_mask[idx],
+            'labels': int(self.labels[idx])
         }
 
 
+class IterableWebSafetyDataset(IterableDataset):
+    """Streaming variant for corpora too large to hold in memory
+
+    Each DataLoader worker claims a disjoint byte range of the JSONL
+    file, seeks to the next line boundary, and tokenizes on the fly, so
+    memory stays flat no matter how large the corpus grows. The
+    in-memory WebSafetyDataset remains the default for datasets that
+    fit, since it supports length grouping and random sampling.
+    """
+
+    def __init__(self, filepath: str, tokenizer, max_length=512):
+        self.filepath = filepath
+        self.tokenizer = tokenizer
+        self.max_length = max_length
+        self.label2id = LABEL2ID
+        self.id2label = {v: k for k, v in self.label2id.items()}
+
+    def __iter__(self):
+        worker_info = get_worker_info()
+        num_shards = worker_info.num_workers if worker_info else 1
+        shard_id = worker_info.id if worker_info else 0
+
+        file_size = os.path.getsize(self.filepath)
+        start = file_size * shard_id // num_shards
+        end = file_size * (shard_id + 1) // num_shards
+
+        with open(self.filepath, 'rb') as f:
+            f.seek(start)
+            if start:
+                # The line straddling the boundary belongs to the
+                # previous shard
+                f.readline()
+            while f.tell() < end:
+                line = f.readline()
+                if not line:
+                    break
+                sample = orjson.loads(line)
+                encoding = self.tokenizer(
+                    sample['text'],
+                    max_length=self.max_length,
+                    truncation=True
+                )
+                yield {
+                    'input_ids': encoding['input_ids'],
+                    'attention_mask': encoding['attention_mask'],
+                    'labels': self.label2id[sample['primary_label']]
+                }
+
+
+def preprocess_logits_for_metrics(logits, labels):
+    """Argmax on device so only class ids cross to host memory"""
+    return logits.argmax(dim=-1)
+
+
 def compute_metrics(pred):
     """Compute metrics for evaluation"""
+    # Predictions arrive as class ids - the argmax already ran on device
     labels = pred.label_ids
-    preds = pred.predictions.argmax(-1)
-    
+    preds = pred.predictions
+
     precision, recall, f1, _ = precision_recall_fscore_support(
         labels, preds, average='weighted', zero_division=0
     )
@@ -105,7 +174,11 @@ def train_model(
     learning_rate: float = 2e-5
 ):
     """Train the model"""
-    
+
+    # Allow TF32 matmuls on Ampere+ GPUs - free throughput for FP32 ops
+    torch.backends.cuda.matmul.allow_tf32 = True
+    torch.set_float32_matmul_precision('high')
+
     print("="*70)
     print("WebSafety Custom Model Training")
     print("="*70)
@@ -117,13 +190,19 @@ def train_model(
     
     # Load tokenizer and model
     print("\nLoading tokenizer and model...")
-    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=True)
     model = AutoModelForSequenceClassification.from_pretrained(
         model_name,
         num_labels=7,  # 7 primary categories
         problem_type="single_label_classification"
     )
-    
+
+    # Compile so Inductor fuses pointwise/matmul chains and cuts per-op
+    # launch overhead; pad_to_multiple_of keeps the shape variety small
+    if torch.cuda.is_available() and hasattr(torch, 'compile'):
+        model = torch.compile(model, mode='reduce-overhead')
+
+
     # Create datasets
     print("Loading datasets...")
     train_dataset = WebSafetyDataset(train_file, tokenizer)
@@ -149,6 +228,18 @@ def train_model(
         metric_for_best_model="f1",
         greater_is_better=True,
         save_total_limit=2,
+        # Batch similar-length sequences together to minimize padding waste
+        group_by_length=True,
+        # Collate in worker processes so batches are ready before the GPU
+        # asks; pinned host memory makes the H2D copies async
+        dataloader_num_workers=4,
+        dataloader_pin_memory=True,
+        dataloader_persistent_workers=True,
+        dataloader_prefetch_factor=4,
+        # Mixed precision on GPU - half-precision matmuls run on Tensor
+        # Cores; prefer bf16 where the hardware supports it
+        fp16=torch.cuda.is_available() and not torch.cuda.is_bf16_supported(),
+        bf16=torch.cuda.is_available() and torch.cuda.is_bf16_supported(),
         report_to="none",  # Disable wandb/tensorboard for simplicity
     )
     
@@ -158,7 +249,10 @@ def train_model(
         args=training_args,
         train_dataset=train_dataset,
         eval_dataset=val_dataset,
+        # Pad per batch, to a multiple of 8 for Tensor Core divisibility
+        data_collator=DataCollatorWithPadding(tokenizer, pad_to_multiple_of=8),
         compute_metrics=compute_metrics,
+        preprocess_logits_for_metrics=preprocess_logits_for_metrics,
         callbacks=[EarlyStoppingCallback(early_stopping_patience=2)]
     )
     
@@ -231,7 +325,7 @@ def main():
         '--batch-size',
         type=int,
         default=16,
-        help='Batch size'
+        help='Batch size (keep a multiple of 8 so Tensor Cores stay engaged)'
     )
     parser.add_argument(
         '--learning-rate',
@@ -249,7 +343,7 @@ def main():
     
     if args.dry_run:
         print("DRY RUN MODE - Validating data loading...")
-        tokenizer = AutoTokenizer.from_pretrained(args.model)
+        tokenizer = AutoTokenizer.from_pretrained(args.model, use_fast=True)
         train_dataset = WebSafetyDataset(args.train, tokenizer)
         val_dataset = WebSafetyDataset(args.val, tokenizer)
         print(f"✓ Successfully loaded {len(train_dataset)} train and {len(val_dataset)} val samples")
@@ -5,22 +5,27 @@ Fine-tunes XLM-RoBERTa on 9K multilingual dataset
 This script is designed to run on Kaggle with GPU acceleration.
 """
 
+import hashlib
 import json
+import os
+import orjson
 import torch
 import numpy as np
 import pandas as pd
 from pathlib import Path
 from sklearn.metrics import classification_report, confusion_matrix, f1_score
 from transformers import (
-    XLMRobertaTokenizer, 
+    AutoTokenizer,
     XLMRobertaForSequenceClassification,
-    Trainer, 
+    DataCollatorWithPadding,
+    Trainer,
     TrainingArguments,
     EarlyStoppingCallback
 )
-from datasets import Dataset
-import matplotlib.pyplot as plt
-import seaborn as sns
+from datasets import Dataset, load_from_disk
+
+# Let the Rust tokenizer use its thread pool for batched encoding
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "true")
 
 # Label mapping
 LABEL_MAP = {
@@ -36,20 +41,39 @@ LABEL_MAP = {
 ID_TO_LABEL = {v: k for k, v in LABEL_MAP.items()}
 
 class WebSafetyDataset:
-    def __init__(self, tokenizer, max_length=256):
+    def __init__(self, tokenizer, max_length=256, cache_dir='./tok_cache'):
         self.tokenizer = tokenizer
         self.max_length = max_length
+        self.cache_dir = cache_dir
     
     def load_jsonl(self, file_path):
         """Load JSONL file"""
+        # orjson parses each line in native code - the stdlib parser is
+        # the slowest part of loading a 9K-sample corpus
         data = []
-        with open(file_path, 'r', encoding='utf-8') as f:
+        with open(file_path, 'rb') as f:
             for line in f:
-                data.append(json.loads(line))
+                data.append(orjson.loads(line))
         return data
     
+    def _cache_path(self, file_path):
+        """Cache location keyed on input file, tokenizer and max_length"""
+        key = hashlib.md5(
+            f"{file_path}:{os.path.getmtime(file_path)}:"
+            f"{self.tokenizer.name_or_path}:{self.max_length}".encode()
+        ).hexdigest()
+        return os.path.join(self.cache_dir, key)
+
     def prepare_dataset(self, file_path):
         """Prepare dataset for training"""
+        # Reload the memory-mapped Arrow cache when nothing changed -
+        # re-tokenizing the same JSONL every run is pure waste
+        cache = self._cache_path(file_path)
+        if os.path.isdir(cache):
+            tokenized_dataset = load_from_disk(cache)
+            print(f"📂 Reusing tokenized cache for {file_path} ({len(tokenized_dataset)} samples)")
+            return tokenized_dataset
+
         print(f"📂 Loading {file_path}...")
         raw_data = self.load_jsonl(file_path)
         
@@ -67,23 +91,32 @@ class WebSafetyDataset:
         
         # Tokenize
         def tokenize_function(examples):
+            # No padding here - the per-batch collator pads dynamically
             return self.tokenizer(
                 examples['text'],
-                padding='max_length',
+                padding=False,
                 truncation=True,
                 max_length=self.max_length
             )
         
-        tokenized_dataset = dataset.map(tokenize_function, batched=True)
+        tokenized_dataset = dataset.map(
+            tokenize_function, batched=True, batch_size=1000, num_proc=4
+        )
         print(f"   ✅ Loaded {len(tokenized_dataset)} samples")
-        
+
+        tokenized_dataset.save_to_disk(cache)
+
         return tokenized_dataset
 
+def preprocess_logits_for_metrics(logits, labels):
+    """Argmax on device so only class ids cross to host memory"""
+    return logits.argmax(dim=-1)
+
 def compute_metrics(eval_pred):
     """Compute metrics for evaluation"""
+    # Predictions arrive as class ids - the argmax already ran on device
     predictions, labels = eval_pred
-    predictions = np.argmax(predictions, axis=1)
-    
+
     # F1 scores
     f1_macro = f1_score(labels, predictions, average='macro')
     f1_weighted = f1_score(labels, predictions, average='weighted')
@@ -97,14 +130,24 @@ def compute_metrics(eval_pred):
         'f1_weighted': f1_weighted
     }
 
-def plot_confusion_matrix(trainer, test_dataset, output_path):
-    """Plot confusion matrix"""
-    predictions = trainer.predict(test_dataset)
-    y_pred = np.argmax(predictions.predictions, axis=1)
-    y_true = predictions.label_ids
-    
+def plot_confusion_matrix(y_true, y_pred, output_path, plot=True):
+    """Plot confusion matrix from an existing prediction pass
+
+    With plot=False (or WEBSAFETY_NO_PLOT=1) the matrix is written as
+    CSV instead, skipping the matplotlib/seaborn imports entirely.
+    """
     cm = confusion_matrix(y_true, y_pred)
-    
+
+    if not plot or os.environ.get('WEBSAFETY_NO_PLOT') == '1':
+        csv_path = output_path.replace('.png', '.csv')
+        np.savetxt(csv_path, cm, fmt='%d', delimiter=',')
+        print(f"📊 Confusion matrix saved to {csv_path}")
+        return
+
+    # Imported here so headless runs never pay for the plotting stack
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
     plt.figure(figsize=(10, 8))
     sns.heatmap(
         cm, 
@@ -128,7 +171,7 @@ def train_model(
     output_dir='./websafety-model',
     model_name='xlm-roberta-base',
     epochs=4,
-    batch_size=16,
+    batch_size=32,
     learning_rate=2e-5
 ):
     """Main training function"""
@@ -143,9 +186,9 @@ def train_model(
     if device == 'cuda':
         print(f"   GPU: {torch.cuda.get_device_name(0)}\n")
     
-    # Load tokenizer
+    # Load tokenizer (fast variant - Rust backend with batched encoding)
     print("📥 Loading tokenizer...")
-    tokenizer = XLMRobertaTokenizer.from_pretrained(model_name)
+    tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=True)
     
     # Prepare datasets
     dataset_loader = WebSafetyDataset(tokenizer)
@@ -158,10 +201,18 @@ def train_model(
     model = XLMRobertaForSequenceClassification.from_pretrained(
         model_name,
         num_labels=len(LABEL_MAP),
-        problem_type="single_label_classification"
+        problem_type="single_label_classification",
+        # PyTorch scaled_dot_product_attention picks the fused
+        # Flash/memory-efficient kernel instead of eager attention
+        attn_implementation="sdpa"
     )
     model.to(device)
-    
+
+    # Compile so Inductor fuses kernels; max-autotune suits the long
+    # Kaggle job (autotuning cost amortizes over 4 epochs)
+    if torch.cuda.is_available() and hasattr(torch, 'compile'):
+        model = torch.compile(model, mode='max-autotune')
+
     # Training arguments
     training_args = TrainingArguments(
         output_dir=output_dir,
@@ -169,16 +220,33 @@ def train_model(
         save_strategy="epoch",
         learning_rate=learning_rate,
         per_device_train_batch_size=batch_size,
-        per_device_eval_batch_size=batch_size,
+        # Eval keeps no activations, so it can run much larger batches
+        per_device_eval_batch_size=batch_size * 4,
         num_train_epochs=epochs,
+        # Checkpointing recomputes activations in backward, freeing the
+        # memory that lets the per-step batch double; accumulation stacks
+        # 4 steps into one optimizer update for a large effective batch
+        gradient_checkpointing=True,
+        gradient_accumulation_steps=4,
         weight_decay=0.01,
-        warmup_steps=500,
+        # Accumulation cuts optimizer steps to ~200 for this split, so a
+        # fixed 500-step warmup would never finish; warm up 10% of
+        # whatever the schedule's total actually is
+        warmup_ratio=0.1,
         logging_dir=f'{output_dir}/logs',
         logging_steps=100,
         load_best_model_at_end=True,
         metric_for_best_model='f1_macro',
         greater_is_better=True,
         save_total_limit=2,
+        # Batch similar-length sequences together to minimize padding waste
+        group_by_length=True,
+        # Collate in worker processes so batches are ready before the GPU
+        # asks; pinned host memory makes the H2D copies async
+        dataloader_num_workers=4,
+        dataloader_pin_memory=True,
+        dataloader_persistent_workers=True,
+        dataloader_prefetch_factor=4,
         fp16=torch.cuda.is_available(),  # Mixed precision if GPU available
         report_to='none'  # Disable wandb/tensorboard
     )
@@ -189,7 +257,10 @@ def train_model(
         args=training_args,
         train_dataset=train_dataset,
         eval_dataset=val_dataset,
+        # Pad per batch, to a multiple of 8 for Tensor Core divisibility
+        data_collator=DataCollatorWithPadding(tokenizer, pad_to_multiple_of=8),
         compute_metrics=compute_metrics,
+        preprocess_logits_for_metrics=preprocess_logits_for_metrics,
         callbacks=[EarlyStoppingCallback(early_stopping_patience=2)]
     )
     
@@ -197,18 +268,18 @@ def train_model(
     print("\n🏋️ Training started...\n")
     trainer.train()
     
-    # Evaluate on test set
+    # Evaluate on test set - one forward pass feeds the metrics, the
+    # classification report and the confusion matrix
     print("\n📊 Evaluating on test set...")
-    test_results = trainer.evaluate(test_dataset)
+    predictions = trainer.predict(test_dataset)
+    test_results = predictions.metrics
     print("\nTest Results:")
     for key, value in test_results.items():
         print(f"  {key}: {value:.4f}")
-    
-    # Detailed classification report
-    predictions = trainer.predict(test_dataset)
-    y_pred = np.argmax(predictions.predictions, axis=1)
+
+    y_pred = predictions.predictions
     y_true = predictions.label_ids
-    
+
     print("\n📋 Classification Report:")
     print(classification_report(
         y_true, 
@@ -217,8 +288,8 @@ def train_model(
         digits=4
     ))
     
-    # Plot confusion matrix
-    plot_confusion_matrix(trainer, test_dataset, f'{output_dir}/confusion_matrix.png')
+    # Plot confusion matrix from the same predictions
+    plot_confusion_matrix(y_true, y_pred, f'{output_dir}/confusion_matrix.png')
     
     # Save model
     print(f"\n💾 Saving model to {output_dir}...")
@@ -249,7 +320,7 @@ if __name__ == "__main__":
         output_dir=OUTPUT_DIR,
         model_name='xlm-roberta-base',
         epochs=4,
-        batch_size=16,
+        batch_size=32,
         learning_rate=2e-5
     )
     
@@ -2,32 +2,122 @@
 Feature Extraction for URL Classification
 Extracts 20 features from each URL for ML training
 """
-import json
+import multiprocessing as mp
+import os
 import re
+from collections import Counter
 from urllib.parse import urlparse
 import math
 
+import numpy as np
+import orjson
+import pandas as pd
+
 # https://github.com/MarkEZhang/URLNet/blob/master/url_features.py
 # URL shorteners list
-URL_SHORTENERS = ['bit.ly', 'goo.gl', 'tinyurl.com', 't.co', 'ow.ly', 'is.gd', 'buff.ly', 'adf.ly']
+URL_SHORTENERS = ('bit.ly', 'goo.gl', 'tinyurl.com', 't.co', 'ow.ly', 'is.gd', 'buff.ly', 'adf.ly')
 
-# Suspicious TLDs
-SUSPICIOUS_TLDS = ['.tk', '.ml', '.ga', '.cf', '.gq', '.xyz', '.top', '.work', '.click', '.online', '.download']
+# Suspicious TLDs (tuple so str.endswith can take it in one C call)
+SUSPICIOUS_TLDS = ('.tk', '.ml', '.ga', '.cf', '.gq', '.xyz', '.top', '.work', '.click', '.online', '.download')
 
 # Suspicious keywords
-SUSPICIOUS_KEYWORDS = [
+SUSPICIOUS_KEYWORDS = (
     'login', 'verify', 'account', 'secure', 'update', 'confirm',
     'banking', 'paypal', 'ebay', 'amazon', 'suspended', 'limited'
-]
+)
 
-def calculate_entropy(text):
-    """Calculate Shannon entropy of a string"""
-    if not text:
-        return 0.0
-    
-    prob = [float(text.count(c)) / len(text) for c in dict.fromkeys(list(text))]
-    entropy = - sum([p * math.log(p) / math.log(2.0) for p in prob])
-    return entropy
+# Compiled once at import: one C-level multi-pattern scan per URL instead
+# of a Python any() loop over every keyword/shortener
+IP_RE = re.compile(r'^(\d{1,3}\.){3}\d{1,3}$')
+KEYWORD_RE = re.compile('|'.join(map(re.escape, SUSPICIOUS_KEYWORDS)))
+SHORTENER_RE = re.compile('|'.join(map(re.escape, URL_SHORTENERS)))
+
+# Feature schema: column order and dtypes for the SoA feature table.
+# Counts are int32, entropies/ratios float32, flags int8.
+FEATURE_DTYPE = np.dtype([
+    ('url_length', 'i4'), ('domain_length', 'i4'), ('path_length', 'i4'),
+    ('subdomain_count', 'i4'), ('has_https', 'i1'), ('has_ip', 'i1'),
+    ('suspicious_tld', 'i1'), ('special_char_count', 'i4'),
+    ('digit_count', 'i4'), ('is_shortener', 'i1'),
+    ('has_suspicious_keywords', 'i1'), ('domain_entropy', 'f4'),
+    ('path_entropy', 'f4'), ('dot_count', 'i4'), ('hyphen_count', 'i4'),
+    ('has_port', 'i1'), ('query_param_count', 'i4'),
+    ('has_double_slash', 'i1'), ('digit_ratio', 'f4'),
+    ('special_char_ratio', 'f4')
+])
+FEATURE_NAMES = list(FEATURE_DTYPE.names)
+
+# Translate-and-measure tables: len(url) - len(url.translate(table))
+# counts the deleted characters in one C pass
+_NO_DIGITS = str.maketrans('', '', '0123456789')
+_NO_SPECIAL = str.maketrans('', '', '@-_%&=?#')
+
+try:
+    # Optional numba JIT: entropy over the UTF-8 bytes via a 256-bin
+    # histogram compiles to a tight LLVM loop, skipping Python float
+    # boxing on the hottest per-URL function
+    from numba import njit, types
+
+    # frombuffer views over bytes are read-only, so the signatures must
+    # say so - plain 'u1[::1]' only matches writable arrays
+    _U8_RO = types.Array(types.uint8, 1, 'C', readonly=True)
+
+    # Explicit signatures compile eagerly at import and cache=True
+    # persists the LLVM output on disk, so later runs (and any process
+    # importing this module at inference time) skip JIT entirely
+    @njit(types.f8(_U8_RO), cache=True)
+    def _entropy_u8(arr):
+        counts = np.zeros(256, dtype=np.int32)
+        for b in arr:
+            counts[b] += 1
+        n = arr.size
+        if n <= 1:
+            return 0.0
+        entropy = 0.0
+        inv = 1.0 / n
+        for c in counts:
+            if c:
+                p = c * inv
+                entropy -= p * math.log2(p)
+        return entropy
+
+    @njit(types.UniTuple(types.i8, 2)(_U8_RO), cache=True)
+    def _digit_special_u8(arr):
+        """One pass over URL bytes: digit and special-char counts"""
+        digits = 0
+        specials = 0
+        for b in arr:
+            if 48 <= b <= 57:  # 0-9
+                digits += 1
+            # @ - _ % & = ? #
+            elif b == 64 or b == 45 or b == 95 or b == 37 or b == 38 \
+                    or b == 61 or b == 63 or b == 35:
+                specials += 1
+        return digits, specials
+
+    _HAVE_NUMBA = True
+
+    def calculate_entropy(text):
+        """Calculate Shannon entropy of a string"""
+        # Entropy of zero or one character is 0 - skip the kernel call
+        if len(text) <= 1:
+            return 0.0
+        return _entropy_u8(np.frombuffer(text.encode('utf-8'), dtype=np.uint8))
+
+except ImportError:
+    _HAVE_NUMBA = False
+
+    def calculate_entropy(text):
+        """Calculate Shannon entropy of a string"""
+        # Entropy of zero or one character is 0 - skip the counting
+        if len(text) <= 1:
+            return 0.0
+
+        # Counter is one C-level pass; the old text.count(c) per distinct
+        # char re-scanned the string O(n*k) times
+        total = len(text)
+        counts = Counter(text)
+        return -sum((c / total) * math.log2(c / total) for c in counts.values())
 
 def extract_url_features(url):
     """
@@ -41,7 +131,10 @@ def extract_url_features(url):
         domain = parsed.netloc.lower()
         path = parsed.path.lower()
         full_url = url.lower()
-        
+
+        # One Counter pass per string replaces the per-feature re-scans
+        domain_counter = Counter(domain)
+
         # Feature 1: URL Length
         url_length = len(url)
         
@@ -51,31 +144,34 @@ def extract_url_features(url):
         # Feature 3: Path Length
         path_length = len(path)
         
-        # Feature 4: Number of subdomains
-        subdomain_count = domain.count('.')
+        # Feature 4: Number of subdomains (same value serves dot_count below)
+        dot_count = domain_counter['.']
+        subdomain_count = dot_count
         
         # Feature 5: Has HTTPS
         has_https = 1 if parsed.scheme == 'https' else 0
         
         # Feature 6: Has IP address
-        ip_pattern = re.compile(r'^(\d{1,3}\.){3}\d{1,3}$')
-        has_ip = 1 if ip_pattern.match(domain) else 0
-        
+        has_ip = 1 if IP_RE.match(domain) else 0
+
         # Feature 7: Suspicious TLD
-        suspicious_tld = 1 if any(domain.endswith(tld) for tld in SUSPICIOUS_TLDS) else 0
-        
-        # Feature 8: Special character count
-        special_chars = ['@', '-', '_', '%', '&', '=', '?', '#']
-        special_char_count = sum(url.count(char) for char in special_chars)
+        suspicious_tld = 1 if domain.endswith(SUSPICIOUS_TLDS) else 0
         
-        # Feature 9: Digit count
-        digit_count = sum(c.isdigit() for c in url)
+        # Features 8 and 9: special-char and digit counts, fused into one
+        # JIT pass over the URL bytes when numba is available
+        if _HAVE_NUMBA:
+            digit_count, special_char_count = map(
+                int, _digit_special_u8(np.frombuffer(url.encode('utf-8'), dtype=np.uint8))
+            )
+        else:
+            digit_count = url_length - len(url.translate(_NO_DIGITS))
+            special_char_count = url_length - len(url.translate(_NO_SPECIAL))
         
         # Feature 10: Is URL shortener
-        is_shortener = 1 if any(shortener in domain for shortener in URL_SHORTENERS) else 0
-        
+        is_shortener = 1 if SHORTENER_RE.search(domain) else 0
+
         # Feature 11: Has suspicious keywords
-        has_suspicious_keywords = 1 if any(keyword in full_url for keyword in SUSPICIOUS_KEYWORDS) else 0
+        has_suspicious_keywords = 1 if KEYWORD_RE.search(full_url) else 0
         
         # Feature 12: Domain entropy
         domain_entropy = calculate_entropy(domain)
@@ -83,14 +179,13 @@ def extract_url_features(url):
         # Feature 13: Path entropy
         path_entropy = calculate_entropy(path) if path else 0.0
         
-        # Feature 14: Number of dots in domain
-        dot_count = domain.count('.')
-        
+        # Feature 14: Number of dots in domain (computed with Feature 4)
+
         # Feature 15: Number of hyphens in domain
-        hyphen_count = domain.count('-')
-        
+        hyphen_count = domain_counter['-']
+
         # Feature 16: Has port number
-        has_port = 1 if ':' in domain else 0
+        has_port = 1 if domain_counter[':'] else 0
         
         # Feature 17: Query parameter count
         query_param_count = parsed.query.count('&') + (1 if parsed.query else 0)
@@ -131,48 +226,64 @@ def extract_url_features(url):
         print(f"Error extracting features from {url}: {e}")
         return None
 
+def _process_line(line):
+    """Worker: parse one JSONL line into (url, label, feature tuple)"""
+    item = orjson.loads(line)
+    features = extract_url_features(item['url'])
+
+    if not features:
+        return None
+
+    return item['url'], item['label'], tuple(features[name] for name in FEATURE_NAMES)
+
 def extract_features_from_dataset(input_file, output_file):
-    """Extract features from dataset and save"""
+    """Extract features from dataset and save as a Parquet table"""
     print(f"📊 Extracting features from {input_file}...")
-    
-    data = []
-    with open(input_file, 'r', encoding='utf-8') as f:
-        for line in f:
-            item = json.loads(line)
-            features = extract_url_features(item['url'])
-            
-            if features:
-                data.append({
-                    "url": item['url'],
-                    "label": item['label'],
-                    "features": features
-                })
-    
-    # Save
-    with open(output_file, 'w', encoding='utf-8') as f:
-        for item in data:
-            f.write(json.dumps(item) + '\n')
-    
-    print(f"✅ Extracted features for {len(data)} URLs")
+
+    # Feature extraction is pure CPU and per-line independent, so fan it
+    # out across cores
+    with open(input_file, 'rb') as f:
+        lines = f.readlines()
+
+    urls, labels, rows = [], [], []
+    with mp.Pool(os.cpu_count()) as pool:
+        # Ordered imap keeps Parquet row order reproducible for the
+        # seeded downstream split; with chunksize=1000 the ordering
+        # overhead is noise
+        for result in pool.imap(_process_line, lines, chunksize=1000):
+            if result:
+                url, label, values = result
+                urls.append(url)
+                labels.append(label)
+                rows.append(values)
+
+    # SoA: one typed contiguous column per feature instead of a dict per
+    # URL, written as Parquet so training loads it without re-parsing JSON
+    table = pd.DataFrame(np.array(rows, dtype=FEATURE_DTYPE))
+    table.insert(0, 'url', urls)
+    table.insert(1, 'label', labels)
+    table.to_parquet(output_file, index=False)
+
+    print(f"✅ Extracted features for {len(table)} URLs")
     print(f"💾 Saved to {output_file}")
-    
-    return data
+
+    return len(table)
 
 if __name__ == "__main__":
     # Extract features for all splits
     extract_features_from_dataset(
         "processed/train_urls.jsonl",
-        "processed/train_urls_features.jsonl"
+        "processed/train_urls_features.parquet"
     )
-    
+
     extract_features_from_dataset(
         "processed/val_urls.jsonl",
-        "processed/val_urls_features.jsonl"
+        "processed/val_urls_features.parquet"
     )
-    
+
     extract_features_from_dataset(
         "processed/test_urls.jsonl",
-        "processed/test_urls_features.jsonl"
+        "processed/test_urls_features.parquet"
     )
-    
+
     print("\n✅ Feature extraction complete!")
@@ -1,23 +1,29 @@
 """
 Combine all URL datasets and create train/val/test splits
 """
-import json
-import random
+import numpy as np
+import orjson
 from collections import Counter
+from sklearn.model_selection import train_test_split
 
 def load_jsonl(filepath):
     """Load JSONL file"""
     data = []
-    with open(filepath, 'r', encoding='utf-8') as f:
+    with open(filepath, 'rb') as f:
         for line in f:
-            data.append(json.loads(line))
+            data.append(orjson.loads(line))
     return data
 
-def save_jsonl(data, filepath):
+def save_jsonl(data, filepath, chunk_size=10000):
     """Save to JSONL file"""
-    with open(filepath, 'w', encoding='utf-8') as f:
-        for item in data:
-            f.write(json.dumps(item) + '\n')
+    # Join serialized rows in blocks and write each block at once - one
+    # buffered write per 10k rows instead of two per row; chunking caps
+    # peak memory on large corpora
+    with open(filepath, 'wb') as f:
+        for start in range(0, len(data), chunk_size):
+            chunk = data[start:start + chunk_size]
+            f.write(b'\n'.join(orjson.dumps(item) for item in chunk))
+            f.write(b'\n')
 
 def combine_and_split():
     """Combine all URL datasets and create splits"""
@@ -39,16 +45,22 @@ def combine_and_split():
     for label, count in Counter(labels).items():
         print(f"   - {label}: {count}")
     
-    # Shuffle
-    random.shuffle(all_urls)
-    
-    # Split: 70% train, 15% val, 15% test
-    train_size = int(0.7 * len(all_urls))
-    val_size = int(0.15 * len(all_urls))
-    
-    train_data = all_urls[:train_size]
-    val_data = all_urls[train_size:train_size + val_size]
-    test_data = all_urls[train_size + val_size:]
+    # Split: 70% train, 15% val, 15% test - stratified on label so every
+    # split keeps the per-class proportions, shuffling index arrays
+    # instead of moving the dicts themselves
+    labels_arr = np.asarray(labels)
+    idx = np.arange(len(all_urls))
+
+    train_idx, rest_idx = train_test_split(
+        idx, test_size=0.3, stratify=labels_arr, random_state=42
+    )
+    val_idx, test_idx = train_test_split(
+        rest_idx, test_size=0.5, stratify=labels_arr[rest_idx], random_state=42
+    )
+
+    train_data = [all_urls[i] for i in train_idx]
+    val_data = [all_urls[i] for i in val_idx]
+    test_data = [all_urls[i] for i in test_idx]
     
     print(f"\n📊 Split sizes:")
     print(f"   - Train: {len(train_data)} (70%)")
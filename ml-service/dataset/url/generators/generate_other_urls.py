@@ -5,9 +5,15 @@ Generate Malware, Spam, and Suspicious URL samples
 - Suspicious: 1,000 URLs
 Total: 3,500 URLs
 """
-import json
-import random
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import chain
+
+import numpy as np
+import orjson
+import re
 from datetime import datetime
+from urllib.parse import urlparse
 
 # Malware-related patterns
 MALWARE_KEYWORDS = [
@@ -29,178 +35,247 @@ SPAM_KEYWORDS = [
 # Suspicious patterns
 URL_SHORTENERS = ["bit.ly", "goo.gl", "tinyurl.com", "t.co", "ow.ly", "is.gd"]
 
-def generate_malware_urls(count=1500):
+# Compiled once at import instead of per extract_features call
+IP_RE = re.compile(r'^(\d{1,3}\.){3}\d{1,3}$')
+
+# Tuple form so str.endswith checks all suffixes in one C call
+SUSPICIOUS_TLD_SUFFIXES = ('.tk', '.ml', '.ga', '.cf', '.gq', '.xyz', '.top', '.work')
+
+def generate_malware_urls(count=1500, seed=42):
     """Generate malware distribution URLs"""
     urls = []
-    
-    for _ in range(count):
-        pattern_type = random.choice(['download', 'crack', 'ip_based'])
-        
+
+    # One timestamp per batch - every URL in a run shares it anyway
+    ts = datetime.now().isoformat()
+
+    # Pre-draw all randomness for the batch in a handful of vectorized
+    # calls; the loop body is then pure indexing and formatting
+    pattern_types = ('download', 'crack', 'ip_based')
+    download_tlds = ('.top', '.xyz', '.download', '.ml', '.tk')
+    crack_tlds = ('.xyz', '.top', '.work')
+    years = ('2023', '2024', '2025')
+    files = ('malware.exe', 'trojan.exe', 'virus.exe', 'backdoor.exe')
+
+    # One shared metadata dict per pattern - records are serialized, not
+    # mutated, so N identical dict allocations buy nothing
+    meta = {
+        pt: {"generated": True, "pattern": pt, "timestamp": ts}
+        for pt in pattern_types
+    }
+
+    rng = np.random.default_rng(seed)
+    pattern_idx = rng.integers(0, len(pattern_types), size=count)
+    sw_idx = rng.integers(0, len(SOFTWARE_NAMES), size=count)
+    kw_idx = rng.integers(0, len(MALWARE_KEYWORDS), size=count)
+    dl_tld_idx = rng.integers(0, len(download_tlds), size=count)
+    crack_tld_idx = rng.integers(0, len(crack_tlds), size=count)
+    year_idx = rng.integers(0, len(years), size=count)
+    file_idx = rng.integers(0, len(files), size=count)
+    ips = rng.integers(1, 256, size=(count, 4))
+
+    for i in range(count):
+        pattern_type = pattern_types[pattern_idx[i]]
+
         if pattern_type == 'download':
-            software = random.choice(SOFTWARE_NAMES)
-            keyword = random.choice(MALWARE_KEYWORDS)
-            tld = random.choice(['.top', '.xyz', '.download', '.ml', '.tk'])
-            domain = f"{keyword}-{software}"
-            url = f"http://{domain}{tld}/download.exe"
-            
+            software = SOFTWARE_NAMES[sw_idx[i]]
+            keyword = MALWARE_KEYWORDS[kw_idx[i]]
+            tld = download_tlds[dl_tld_idx[i]]
+            url = f"http://{keyword}-{software}{tld}/download.exe"
+
         elif pattern_type == 'crack':
-            software = random.choice(SOFTWARE_NAMES)
-            year = random.choice(['2023', '2024', '2025'])
-            tld = random.choice(['.xyz', '.top', '.work'])
+            software = SOFTWARE_NAMES[sw_idx[i]]
+            year = years[year_idx[i]]
+            tld = crack_tlds[crack_tld_idx[i]]
             url = f"http://crack-{software}-{year}{tld}/setup.exe"
-            
+
         else:  # ip_based
-            ip = f"{random.randint(1,255)}.{random.randint(1,255)}.{random.randint(1,255)}.{random.randint(1,255)}"
-            file = random.choice(['malware.exe', 'trojan.exe', 'virus.exe', 'backdoor.exe'])
-            url = f"http://{ip}/{file}"
-        
-        features = extract_features(url)
-        
+            a, b, c, d = ips[i]
+            url = f"http://{a}.{b}.{c}.{d}/{files[file_idx[i]]}"
+
         urls.append({
             "url": url,
             "label": "malware",
-            "features": features,
-            "metadata": {
-                "generated": True,
-                "pattern": pattern_type,
-                "timestamp": datetime.now().isoformat()
-            }
+            "metadata": meta[pattern_type]
         })
-    
-    return urls
 
-def generate_spam_urls(count=1000):
+    return attach_features(urls)
+
+def generate_spam_urls(count=1000, seed=42):
     """Generate spam/advertising URLs"""
     urls = []
-    
-    for _ in range(count):
+    ts = datetime.now().isoformat()
+
+    tlds = ('.ga', '.cf', '.gq', '.tk', '.ml', '.xyz')
+    path_options = ("", "/click", "/offer", "/promo", "ref")
+
+    # Every spam record shares the same metadata - build it once
+    meta = {"generated": True, "pattern": "spam_advertising", "timestamp": ts}
+
+    # Pre-draw everything: argsort of a random matrix gives each row a
+    # keyword permutation, replacing random.sample per URL
+    rng = np.random.default_rng(seed)
+    kw_perm = np.argsort(rng.random((count, len(SPAM_KEYWORDS))), axis=1)
+    kw_counts = rng.integers(2, 5, size=count)
+    tld_idx = rng.integers(0, len(tlds), size=count)
+    path_idx = rng.integers(0, len(path_options), size=count)
+    ref_nums = rng.integers(1000, 10000, size=count)
+
+    for i in range(count):
         # Create spammy domain
-        keywords = random.sample(SPAM_KEYWORDS, k=random.randint(2, 4))
+        keywords = [SPAM_KEYWORDS[j] for j in kw_perm[i, :kw_counts[i]]]
         domain = "-".join(keywords)
-        tld = random.choice(['.ga', '.cf', '.gq', '.tk', '.ml', '.xyz'])
-        
-        path_options = [
-            "",
-            "/click",
-            "/offer",
-            "/promo",
-            f"/ref{random.randint(1000,9999)}"
-        ]
-        
-        path = random.choice(path_options)
+        tld = tlds[tld_idx[i]]
+
+        path = path_options[path_idx[i]]
+        if path == "ref":
+            path = f"/ref{ref_nums[i]}"
         url = f"http://{domain}{tld}{path}"
-        
-        features = extract_features(url)
-        
+
         urls.append({
             "url": url,
             "label": "spam",
-            "features": features,
-            "metadata": {
-                "generated": True,
-                "pattern": "spam_advertising",
-                "timestamp": datetime.now().isoformat()
-            }
+            "metadata": meta
         })
-    
-    return urls
 
-def generate_suspicious_urls(count=1000):
+    return attach_features(urls)
+
+def generate_suspicious_urls(count=1000, seed=42):
     """Generate suspicious URLs (shorteners, long URLs, etc.)"""
     urls = []
-    
-    for _ in range(count):
-        pattern_type = random.choice(['shortener', 'very_long', 'many_subdomains', 'weird_chars'])
-        
+    ts = datetime.now().isoformat()
+
+    pattern_types = ('shortener', 'very_long', 'many_subdomains', 'weird_chars')
+    code_alphabet = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
+    bases = ('example.com', 'site.com', 'page.net')
+
+    # One shared metadata dict per pattern
+    meta = {
+        pt: {"generated": True, "pattern": pt, "timestamp": ts}
+        for pt in pattern_types
+    }
+
+    # Pre-draw all randomness for the batch in vectorized calls
+    rng = np.random.default_rng(seed)
+    pattern_idx = rng.integers(0, len(pattern_types), size=count)
+    short_idx = rng.integers(0, len(URL_SHORTENERS), size=count)
+    code_chars = rng.integers(0, len(code_alphabet), size=(count, 8))
+    code_lens = rng.integers(5, 9, size=count)
+    base_idx = rng.integers(0, len(bases), size=count)
+    path_counts = rng.integers(10, 21, size=count)
+    param_lens = rng.integers(50, 101, size=count)
+    sub_counts = rng.integers(4, 9, size=count)
+    digit_runs = rng.integers(0, 10, size=(count, 10))
+
+    for i in range(count):
+        pattern_type = pattern_types[pattern_idx[i]]
+
         if pattern_type == 'shortener':
-            shortener = random.choice(URL_SHORTENERS)
-            code = ''.join(random.choices('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789', k=random.randint(5, 8)))
+            shortener = URL_SHORTENERS[short_idx[i]]
+            code = ''.join(code_alphabet[j] for j in code_chars[i, :code_lens[i]])
             url = f"https://{shortener}/{code}"
-            
+
         elif pattern_type == 'very_long':
-            base = random.choice(['example.com', 'site.com', 'page.net'])
-            long_path = '/'.join(['path' + str(i) for i in range(random.randint(10, 20))])
-            url = f"https://{base}/{long_path}?param=" + 'x' * random.randint(50, 100)
-            
+            base = bases[base_idx[i]]
+            long_path = '/'.join(['path' + str(j) for j in range(path_counts[i])])
+            url = f"https://{base}/{long_path}?param=" + 'x' * param_lens[i]
+
         elif pattern_type == 'many_subdomains':
-            subdomains = '.'.join([f'sub{i}' for i in range(random.randint(4, 8))])
+            subdomains = '.'.join([f'sub{j}' for j in range(sub_counts[i])])
             url = f"https://{subdomains}.example.com"
-            
+
         else:  # weird_chars
-            domain = 'site-' + '-'.join([str(random.randint(0, 9)) for _ in range(10)])
-            url = f"http://{domain}.xyz?param=" + '&'.join([f"x{i}=val{i}" for i in range(10)])
-        
-        features = extract_features(url)
-        
+            domain = 'site-' + '-'.join([str(d) for d in digit_runs[i]])
+            url = f"http://{domain}.xyz?param=" + '&'.join([f"x{j}=val{j}" for j in range(10)])
+
         urls.append({
             "url": url,
             "label": "suspicious",
-            "features": features,
-            "metadata": {
-                "generated": True,
-                "pattern": pattern_type,
-                "timestamp": datetime.now().isoformat()
-            }
+            "metadata": meta[pattern_type]
         })
-    
-    return urls
+
+    return attach_features(urls)
+
+# Translate-and-measure: len(u) - len(u.translate(table)) counts the
+# deleted characters in one C pass instead of a Python scan per char
+DIGIT_TRANS = str.maketrans('', '', '0123456789')
+SPECIAL_TRANS = str.maketrans('', '', '@-_%&=?')
+
+def extract_features_batch(urls):
+    """Extract basic features for a batch of URLs"""
+    rows = []
+    for url in urls:
+        parsed = urlparse(url)
+        domain = parsed.netloc
+        url_length = len(url)
+
+        rows.append({
+            "url_length": url_length,
+            "domain_length": len(domain),
+            "path_length": len(parsed.path),
+            "has_https": parsed.scheme == 'https',
+            "has_ip": bool(IP_RE.match(domain)),
+            "subdomain_count": domain.count('.'),
+            "special_char_count": url_length - len(url.translate(SPECIAL_TRANS)),
+            "digit_count": url_length - len(url.translate(DIGIT_TRANS)),
+            "suspicious_tld": domain.endswith(SUSPICIOUS_TLD_SUFFIXES)
+        })
+    return rows
 
 def extract_features(url):
     """Extract basic features from URL"""
-    from urllib.parse import urlparse
-    
-    parsed = urlparse(url)
-    domain = parsed.netloc
-    path = parsed.path
-    
-    # Check for IP address
-    import re
-    ip_pattern = re.compile(r'^(\d{1,3}\.){3}\d{1,3}$')
-    has_ip = bool(ip_pattern.match(domain))
-    
-    # Suspicious TLDs
-    suspicious_tlds = ['.tk', '.ml', '.ga', '.cf', '.gq', '.xyz', '.top', '.work']
-    has_suspicious_tld = any(domain.endswith(tld) for tld in suspicious_tlds)
-    
-    return {
-        "url_length": len(url),
-        "domain_length": len(domain),
-        "path_length": len(path),
-        "has_https": parsed.scheme == 'https',
-        "has_ip": has_ip,
-        "subdomain_count": domain.count('.'),
-        "special_char_count": sum(url.count(c) for c in ['@', '-', '_', '%', '&', '=', '?']),
-        "digit_count": sum(c.isdigit() for c in url),
-        "suspicious_tld": has_suspicious_tld
-    }
+    return extract_features_batch([url])[0]
+
+def attach_features(urls):
+    """Feature-extract a whole batch in one pass after generation"""
+    for entry, features in zip(urls, extract_features_batch([u["url"] for u in urls])):
+        entry["features"] = features
+    return urls
+
+def generate_parallel(pool, fn, count, base_seed, workers):
+    """Split a batch across worker processes, one seed per chunk"""
+    chunk = count // workers
+    counts = [chunk] * workers
+    counts[-1] += count - chunk * workers
+    futures = [pool.submit(fn, c, base_seed + i) for i, c in enumerate(counts)]
+    return list(chain.from_iterable(f.result() for f in futures))
+
+def save_jsonl(data, filepath):
+    """Serialize a batch into one buffer and write it once"""
+    buf = bytearray()
+    for url_data in data:
+        buf += orjson.dumps(url_data)
+        buf += b'\n'
+    with open(filepath, 'wb') as f:
+        f.write(buf)
 
 if __name__ == "__main__":
     print("⚠️ Generating Malware, Spam, and Suspicious URLs...")
-    
-    # Generate all types
-    malware_urls = generate_malware_urls(1500)
-    spam_urls = generate_spam_urls(1000)
-    suspicious_urls = generate_suspicious_urls(1000)
-    
+
+    # Generate all types - each batch fans out across cores, and a single
+    # writer thread drains finished batches so serialization and disk IO
+    # overlap with generation of the next batch (orjson.dumps releases
+    # the GIL)
+    workers = os.cpu_count() or 1
+    with ProcessPoolExecutor(workers) as pool, \
+            ThreadPoolExecutor(max_workers=1) as writer:
+        malware_urls = generate_parallel(pool, generate_malware_urls, 1500, 100, workers)
+        writes = [writer.submit(save_jsonl, malware_urls, "../raw/malware_urls.jsonl")]
+
+        spam_urls = generate_parallel(pool, generate_spam_urls, 1000, 200, workers)
+        writes.append(writer.submit(save_jsonl, spam_urls, "../raw/spam_urls.jsonl"))
+
+        suspicious_urls = generate_parallel(pool, generate_suspicious_urls, 1000, 300, workers)
+        writes.append(writer.submit(save_jsonl, suspicious_urls, "../raw/suspicious_urls.jsonl"))
+
+        for w in writes:
+            w.result()
+
     print(f"✅ Generated URLs:")
     print(f"   - Malware: {len(malware_urls)}")
     print(f"   - Spam: {len(spam_urls)}")
     print(f"   - Suspicious: {len(suspicious_urls)}")
     print(f"   Total: {len(malware_urls) + len(spam_urls) + len(suspicious_urls)}")
-    
-    # Save to separate files
-    with open("../raw/malware_urls.jsonl", 'w', encoding='utf-8') as f:
-        for url_data in malware_urls:
-            f.write(json.dumps(url_data) + '\n')
-    
-    with open("../raw/spam_urls.jsonl", 'w', encoding='utf-8') as f:
-        for url_data in spam_urls:
-            f.write(json.dumps(url_data) + '\n')
-    
-    with open("../raw/suspicious_urls.jsonl", 'w', encoding='utf-8') as f:
-        for url_data in suspicious_urls:
-            f.write(json.dumps(url_data) + '\n')
-    
+
     print(f"💾 Saved to ../raw/")
     print(f"📊 Sample malware: {malware_urls[0]['url']}")
     print(f"📊 Sample spam: {spam_urls[0]['url']}")
@@ -2,9 +2,14 @@
 Generate Phishing URL samples (2,500 URLs)
 Includes typosquatting, suspicious TLDs, and keyword stuffing patterns
 """
-import json
-import random
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+
+import numpy as np
+import orjson
 from datetime import datetime
+from urllib.parse import urlparse
 
 # Major brands for typosquatting
 BRANDS = [
@@ -16,6 +21,10 @@ BRANDS = [
 # Suspicious TLDs commonly used for phishing
 SUSPICIOUS_TLDS = ['.tk', '.ml', '.ga', '.cf', '.gq', '.xyz', '.top', '.work', '.click', '.online']
 
+# TLD suffixes flagged as typosquatting indicators in extract_features;
+# tuple form so str.endswith checks them all in one C call
+SUSPICIOUS_TLD_SUFFIXES = ('.tk', '.ml', '.ga', '.cf', '.gq', '.xyz', '.top', '.work', '.click')
+
 # Phishing keywords
 PHISHING_KEYWORDS = [
     "login", "verify", "account", "secure", "update", "confirm",
@@ -29,149 +38,209 @@ FINANCIAL_TERMS = [
     "visa", "mastercard", "wallet", "crypto", "bitcoin"
 ]
 
-def generate_typosquatting_urls(count=800):
+def generate_typosquatting_urls(count=800, seed=42):
     """Generate typosquatting URLs"""
     urls = []
-    
-    typo_patterns = [
-        lambda b: b.replace('o', '0'),  # google -> g00gle
-        lambda b: b.replace('l', '1'),  # paypal -> paypa1
-        lambda b: b.replace('e', '3'),  # facebook -> fac3book
-        lambda b: b + 'online',         # amazon -> amazononline
-        lambda b: 'secure-' + b,        # secure-paypal
-        lambda b: b + '-login',         # netflix-login
-        lambda b: b.replace('a', '4'),  # amazon -> 4mazon
-        lambda b: b + b[random.choice([-2, -1])],  # paypal -> paypall
-    ]
-    
-    for _ in range(count):
-        brand = random.choice(BRANDS)
-        pattern = random.choice(typo_patterns)
-        typo_brand = pattern(brand)
-        tld = random.choice(SUSPICIOUS_TLDS + ['.com', '.net'])
-        
+
+    # One timestamp per batch - every URL in a run shares it anyway
+    ts = datetime.now().isoformat()
+
+    # Character swaps as translate tables - one C call instead of a
+    # lambda dispatch plus str.replace per URL; None marks the patterns
+    # that are prefix/suffix string ops instead
+    typo_tables = (
+        str.maketrans('o', '0'),  # google -> g00gle
+        str.maketrans('l', '1'),  # paypal -> paypa1
+        str.maketrans('e', '3'),  # facebook -> fac3book
+        None,                     # amazon -> amazononline
+        None,                     # secure-paypal
+        None,                     # netflix-login
+        str.maketrans('a', '4'),  # amazon -> 4mazon
+        None,                     # paypal -> paypall
+    )
+    tlds = tuple(SUSPICIOUS_TLDS) + ('.com', '.net')
+    paths = ("/login", "/verify", "/secure", "/account")
+
+    # Pre-draw all randomness for the batch in vectorized calls
+    rng = np.random.default_rng(seed)
+    brand_idx = rng.integers(0, len(BRANDS), size=count)
+    pattern_idx = rng.integers(0, len(typo_tables), size=count)
+    double_idx = rng.integers(0, 2, size=count)
+    tld_idx = rng.integers(0, len(tlds), size=count)
+    with_path = rng.random(count) >= 0.5
+    path_idx = rng.integers(0, len(paths), size=count)
+
+    for i in range(count):
+        brand = BRANDS[brand_idx[i]]
+        p = pattern_idx[i]
+        table = typo_tables[p]
+        if table is not None:
+            typo_brand = brand.translate(table)
+        elif p == 3:
+            typo_brand = brand + 'online'
+        elif p == 4:
+            typo_brand = 'secure-' + brand
+        elif p == 5:
+            typo_brand = brand + '-login'
+        else:  # letter doubling, e.g. paypal -> paypall
+            typo_brand = brand + brand[-1 - double_idx[i]]
+        tld = tlds[tld_idx[i]]
+
         # Variation
-        if random.random() < 0.5:
-            url = f"https://{typo_brand}{tld}"
+        if with_path[i]:
+            url = f"https://{typo_brand}{tld}{paths[path_idx[i]]}"
         else:
-            path = random.choice(["/login", "/verify", "/secure", "/account"])
-            url = f"https://{typo_brand}{tld}{path}"
-        
-        features = extract_features(url)
-        
+            url = f"https://{typo_brand}{tld}"
+
         urls.append({
             "url": url,
             "label": "phishing",
-            "features": features,
             "metadata": {
                 "generated": True,
                 "pattern": "typosquatting",
                 "original_brand": brand,
-                "timestamp": datetime.now().isoformat()
+                "timestamp": ts
             }
         })
-    
-    return urls
 
-def generate_keyword_stuffing_urls(count=900):
+    return attach_features(urls)
+
+def generate_keyword_stuffing_urls(count=900, seed=42):
     """Generate keyword-stuffed phishing URLs"""
     urls = []
-    
-    for _ in range(count):
+    ts = datetime.now().isoformat()
+
+    tlds = tuple(SUSPICIOUS_TLDS) + ('.com', '.net', '.org')
+    paths = ("/now", "/click", "/here", "/urgent")
+
+    # Pre-draw everything: argsort of a random matrix gives each row a
+    # keyword permutation, replacing random.sample per URL
+    rng = np.random.default_rng(seed)
+    kw_perm = np.argsort(rng.random((count, len(PHISHING_KEYWORDS))), axis=1)
+    kw_counts = rng.integers(3, 6, size=count)
+    tld_idx = rng.integers(0, len(tlds), size=count)
+    with_path = rng.random(count) >= 0.6
+    path_idx = rng.integers(0, len(paths), size=count)
+
+    for i in range(count):
         # Create keyword-stuffed domain
-        keywords = random.sample(PHISHING_KEYWORDS, k=random.randint(3, 5))
+        keywords = [PHISHING_KEYWORDS[j] for j in kw_perm[i, :kw_counts[i]]]
         domain = "-".join(keywords)
-        tld = random.choice(SUSPICIOUS_TLDS + ['.com', '.net', '.org'])
-        
-        if random.random() < 0.6:
-            url = f"https://{domain}{tld}"
+        tld = tlds[tld_idx[i]]
+
+        if with_path[i]:
+            url = f"https://{domain}{tld}{paths[path_idx[i]]}"
         else:
-            path = random.choice(["/now", "/click", "/here", "/urgent"])
-            url = f"https://{domain}{tld}{path}"
-        
-        features = extract_features(url)
-        
+            url = f"https://{domain}{tld}"
+
         urls.append({
             "url": url,
             "label": "phishing",
-            "features": features,
             "metadata": {
                 "generated": True,
                 "pattern": "keyword_stuffing",
                 "keywords": keywords,
-                "timestamp": datetime.now().isoformat()
+                "timestamp": ts
             }
         })
-    
-    return urls
 
-def generate_financial_phishing_urls(count=800):
+    return attach_features(urls)
+
+def generate_financial_phishing_urls(count=800, seed=42):
     """Generate financial/banking phishing URLs"""
     urls = []
-    
-    for _ in range(count):
-        brand = random.choice(BRANDS)
-        financial_term = random.choice(FINANCIAL_TERMS)
-        keyword = random.choice(PHISHING_KEYWORDS)
-        
-        patterns = [
+    ts = datetime.now().isoformat()
+
+    # Every financial record shares the same metadata - build it once
+    meta = {"generated": True, "pattern": "financial_phishing", "timestamp": ts}
+
+    # Pre-draw all randomness for the batch in vectorized calls
+    rng = np.random.default_rng(seed)
+    brand_idx = rng.integers(0, len(BRANDS), size=count)
+    fin_idx = rng.integers(0, len(FINANCIAL_TERMS), size=count)
+    kw_idx = rng.integers(0, len(PHISHING_KEYWORDS), size=count)
+    pattern_choice = rng.integers(0, 5, size=count)
+    tld_idx = rng.integers(0, len(SUSPICIOUS_TLDS), size=count)
+
+    for i in range(count):
+        brand = BRANDS[brand_idx[i]]
+        financial_term = FINANCIAL_TERMS[fin_idx[i]]
+        keyword = PHISHING_KEYWORDS[kw_idx[i]]
+
+        patterns = (
             f"{brand}-{keyword}",
             f"{financial_term}-{keyword}",
             f"{keyword}-{brand}",
             f"secure{brand}",
             f"{brand}{keyword}",
-        ]
-        
-        domain = random.choice(patterns)
-        tld = random.choice(SUSPICIOUS_TLDS)
-        
+        )
+
+        domain = patterns[pattern_choice[i]]
+        tld = SUSPICIOUS_TLDS[tld_idx[i]]
+
         url = f"https://{domain}{tld}"
-        
-        features = extract_features(url)
-        
+
         urls.append({
             "url": url,
             "label": "phishing",
-            "features": features,
-            "metadata": {
-                "generated": True,
-                "pattern": "financial_phishing",
-                "timestamp": datetime.now().isoformat()
-            }
+            "metadata": meta
         })
-    
-    return urls
+
+    return attach_features(urls)
+
+# Translate-and-measure: len(u) - len(u.translate(table)) counts the
+# deleted characters in one C pass instead of a Python scan per char
+DIGIT_TRANS = str.maketrans('', '', '0123456789')
+SPECIAL_TRANS = str.maketrans('', '', '@-_%&=?')
+
+def extract_features_batch(urls):
+    """Extract basic features for a batch of URLs"""
+    rows = []
+    for url in urls:
+        parsed = urlparse(url)
+        domain = parsed.netloc
+        url_length = len(url)
+
+        rows.append({
+            "url_length": url_length,
+            "domain_length": len(domain),
+            "path_length": len(parsed.path),
+            "has_https": parsed.scheme == 'https',
+            "subdomain_count": domain.count('.'),
+            "special_char_count": url_length - len(url.translate(SPECIAL_TRANS)),
+            "digit_count": url_length - len(url.translate(DIGIT_TRANS)),
+            # Typosquatting indicator
+            "suspicious_tld": domain.endswith(SUSPICIOUS_TLD_SUFFIXES)
+        })
+    return rows
 
 def extract_features(url):
     """Extract basic features from URL"""
-    from urllib.parse import urlparse
-    
-    parsed = urlparse(url)
-    domain = parsed.netloc
-    path = parsed.path
-    
-    # Check for typosquatting indicators
-    suspicious_tlds = ['.tk', '.ml', '.ga', '.cf', '.gq', '.xyz', '.top', '.work', '.click']
-    has_suspicious_tld = any(domain.endswith(tld) for tld in suspicious_tlds)
-    
-    return {
-        "url_length": len(url),
-        "domain_length": len(domain),
-        "path_length": len(path),
-        "has_https": parsed.scheme == 'https',
-        "subdomain_count": domain.count('.'),
-        "special_char_count": sum(url.count(c) for c in ['@', '-', '_', '%', '&', '=', '?']),
-        "digit_count": sum(c.isdigit() for c in url),
-        "suspicious_tld": has_suspicious_tld
-    }
+    return extract_features_batch([url])[0]
+
+def attach_features(urls):
+    """Feature-extract a whole batch in one pass after generation"""
+    for entry, features in zip(urls, extract_features_batch([u["url"] for u in urls])):
+        entry["features"] = features
+    return urls
+
+def generate_parallel(pool, fn, count, base_seed, workers):
+    """Split a batch across worker processes, one seed per chunk"""
+    chunk = count // workers
+    counts = [chunk] * workers
+    counts[-1] += count - chunk * workers
+    futures = [pool.submit(fn, c, base_seed + i) for i, c in enumerate(counts)]
+    return list(chain.from_iterable(f.result() for f in futures))
 
 if __name__ == "__main__":
     print("🎣 Generating Phishing URLs...")
-    
-    # Generate different types
-    typo_urls = generate_typosquatting_urls(800)
-    keyword_urls = generate_keyword_stuffing_urls(900)
-    financial_urls = generate_financial_phishing_urls(800)
+
+    # Generate different types - each batch fans out across cores
+    workers = os.cpu_count() or 1
+    with ProcessPoolExecutor(workers) as pool:
+        typo_urls = generate_parallel(pool, generate_typosquatting_urls, 800, 100, workers)
+        keyword_urls = generate_parallel(pool, generate_keyword_stuffing_urls, 900, 200, workers)
+        financial_urls = generate_parallel(pool, generate_financial_phishing_urls, 800, 300, workers)
     
     all_phishing = typo_urls + keyword_urls + financial_urls
     
@@ -180,12 +249,15 @@ if __name__ == "__main__":
     print(f"   - Keyword stuffing: {len(keyword_urls)}")
     print(f"   - Financial phishing: {len(financial_urls)}")
     
-    # Save to file
+    # Save to file - serialize into one buffer, write once
     output_file = "../raw/phishing_urls.jsonl"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        for url_data in all_phishing:
-            f.write(json.dumps(url_data) + '\n')
-    
+    buf = bytearray()
+    for url_data in all_phishing:
+        buf += orjson.dumps(url_data)
+        buf += b'\n'
+    with open(output_file, 'wb') as f:
+        f.write(buf)
+
     print(f"💾 Saved to {output_file}")
     print(f"📊 Sample typo: {typo_urls[0]['url']}")
     print(f"📊 Sample keyword: {keyword_urls[0]['url']}")
@@ -5,15 +5,63 @@ Uses Computer Vision models for NSFW and unsafe content detection
 
 from PIL import Image
 import io
+import os
 import base64
 import logging
 import numpy as np
 import hashlib
+import threading
+from collections import OrderedDict
 from functools import lru_cache
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# pybase64 decodes with SIMD (~3-5x stdlib) - worthwhile for multi-MB
+# image payloads, but the stdlib decoder is a fine fallback
+try:
+    from pybase64 import b64decode as _b64decode
+except ImportError:
+    _b64decode = base64.b64decode
+
+
+def _score_threat(nsfw_score, normal_score, violence_score):
+    """Reduce raw model scores to (is_safe, threat_level, adjusted_violence, max_threat)
+
+    One straight-line numeric reduction on the per-image path - no
+    logging or dict building until the caller assembles the response.
+    """
+    # Apply smart filtering for violence false positives
+    # If violence is detected but NSFW is very low, it's likely a false positive
+    # This prevents nature images, sports, etc. from being flagged as violent
+    adjusted_violence_score = violence_score
+
+    # Only apply aggressive filtering for very obvious false positives
+    # Be more conservative to avoid missing actual injuries/violence
+    if violence_score > 0.6 and nsfw_score < 0.10 and normal_score > 0.85:
+        # Very high violence, very low NSFW, and very high normal confidence
+        # This pattern suggests nature/sports false positive
+        adjusted_violence_score = violence_score * 0.4
+    elif violence_score > 0.5 and nsfw_score < 0.05 and normal_score > 0.90:
+        # Extremely obvious false positive (e.g., pure nature scenes)
+        adjusted_violence_score = violence_score * 0.5
+
+    # Determine overall safety using adjusted scores
+    max_threat_score = max(nsfw_score, adjusted_violence_score)
+    # Stricter threshold - even minor threats should not be marked as completely safe
+    is_safe = max_threat_score < 0.20  # Lowered to 20% to catch injuries/mild violence
+
+    if is_safe:
+        threat_level = "safe"
+    elif max_threat_score > 0.6:  # High threat
+        threat_level = "high"
+    elif max_threat_score > 0.30:  # Medium threat (includes injuries ~20-30%)
+        threat_level = "medium"
+    else:
+        threat_level = "low"  # 20-30% range
+
+    return is_safe, threat_level, adjusted_violence_score, max_threat_score
+
 
 class ImageClassifier:
     """
@@ -32,56 +80,208 @@ class ImageClassifier:
         """Initialize the image classification models"""
         try:
             logger.info("Loading image classification models...")
-            
+
+            # Opt-in int8 ONNX Runtime inference (falls back to PyTorch)
+            use_onnx = os.environ.get('WEBSAFETY_ONNX_INT8', '').lower() in ('1', 'true', 'yes')
+
+            # Run on GPU at fp16 when one is available
+            import torch
+            self.device = 0 if torch.cuda.is_available() else -1
+            if self.device >= 0:
+                logger.info("CUDA available - running image models on GPU at fp16")
+
             # Load NSFW detection model (works correctly)
-            from transformers import pipeline
             logger.info("Loading NSFW detection model...")
-            self.nsfw_detector = pipeline("image-classification", model="Falconsai/nsfw_image_detection")
-            
+            self.nsfw_detector = self._load_detector("Falconsai/nsfw_image_detection", use_onnx)
+
             # Load violence detection model
             # NOTE: jaranohaal/vit-base-violence-detection uses timm format (incompatible)
             # Using Falconsai violence model which loads correctly
             logger.info("Loading violence detection model...")
             try:
-                self.violence_detector = pipeline(
-                    "image-classification",
-                    model="Falconsai/MobileNet_V2_Violence_Offensive"
+                self.violence_detector = self._load_detector(
+                    "Falconsai/MobileNet_V2_Violence_Offensive", use_onnx
                 )
                 logger.info("✓ Violence detection model loaded!")
             except Exception as ve:
                 logger.warning(f"Violence model failed to load: {ve}")
                 logger.warning("Violence detection will be disabled - only NSFW detection active")
                 self.violence_detector = None
-            
+
+            # Only share one preprocessing pass if the two checkpoints'
+            # processors really are configured identically
+            self._share_preprocess = self._processors_match()
+            if self.violence_detector is not None and not self._share_preprocess:
+                logger.info("Detector processors differ - preprocessing per model")
+
+            # These models are single-graph forwards: give intra-op all
+            # the cores, keep inter-op at 1
+            torch.set_num_threads(os.cpu_count() or 1)
+            try:
+                torch.set_num_interop_threads(1)
+            except RuntimeError:
+                pass  # only settable before the first parallel op
+
+            # One dummy inference so the first real request doesn't pay
+            # oneDNN/thread-pool init and lazy tensor allocations
+            try:
+                logger.info("Warming up image models...")
+                self._run_models([Image.new('RGB', (224, 224))])
+            except Exception as we:
+                logger.warning(f"Model warm-up failed (first request will be slower): {we}")
+
             self.model_loaded = True
             logger.info("Image classifier initialized successfully!")
             
-            # Initialize result cache
-            self.result_cache = {}
+            # Initialize result cache (true LRU: hits move entries to the
+            # back, eviction pops from the front)
+            self.result_cache = OrderedDict()
             self.cache_max_size = 100
-            
+            self.cache_lock = threading.Lock()
+
         except Exception as e:
             logger.error(f"Error loading image models: {e}")
             self.model_loaded = False
             self.nsfw_detector = None
             self.violence_detector = None
-            self.result_cache = {}
+            self.result_cache = OrderedDict()
+            self.cache_lock = threading.Lock()
+
+
+
+    def _load_detector(self, model_name, use_onnx):
+        """Build an image-classification pipeline for a checkpoint
+
+        With use_onnx, the checkpoint is exported to ONNX and dynamically
+        quantized to int8 (cached next to this module), which roughly
+        halves CPU inference latency on VNNI-capable x86. Requires
+        optimum[onnxruntime]; anything missing or failing falls back to
+        the plain PyTorch pipeline.
+        """
+        from transformers import pipeline
+
+        if use_onnx:
+            try:
+                from optimum.onnxruntime import ORTModelForImageClassification, ORTQuantizer
+                from optimum.onnxruntime.configuration import AutoQuantizationConfig
+                from transformers import AutoImageProcessor
+
+                quant_dir = os.path.join(
+                    os.path.dirname(__file__), "onnx-int8", model_name.split('/')[-1]
+                )
+                if not os.path.isdir(quant_dir):
+                    logger.info(f"Exporting {model_name} to int8 ONNX (one-time)...")
+                    exported = ORTModelForImageClassification.from_pretrained(model_name, export=True)
+                    quantizer = ORTQuantizer.from_pretrained(exported)
+                    quantizer.quantize(
+                        save_dir=quant_dir,
+                        quantization_config=AutoQuantizationConfig.avx512_vnni(is_static=False)
+                    )
+                model = ORTModelForImageClassification.from_pretrained(quant_dir)
+                processor = AutoImageProcessor.from_pretrained(model_name)
+                logger.info(f"✓ {model_name} running on ONNX Runtime (int8)")
+                return pipeline("image-classification", model=model, image_processor=processor)
+            except ImportError:
+                logger.warning("optimum[onnxruntime] not installed - using PyTorch pipeline")
+            except Exception as e:
+                logger.warning(f"ONNX int8 load failed for {model_name}: {e} - using PyTorch pipeline")
+
+        if self.device >= 0:
+            import torch
+            return pipeline(
+                "image-classification", model=model_name,
+                device=self.device, torch_dtype=torch.float16
+            )
+        return pipeline("image-classification", model=model_name)
+
+    def _processors_match(self):
+        """True when both detectors preprocess images identically
+
+        Matching tensor shapes isn't enough - a shortest-edge resize plus
+        center crop produces different pixels than a direct resize, so
+        every knob that changes the pixels has to agree before one
+        preprocessing pass can feed both models.
+        """
+        if self.violence_detector is None:
+            return True
+        a = self.nsfw_detector.image_processor
+        b = self.violence_detector.image_processor
+        keys = (
+            'size', 'crop_size', 'do_resize', 'do_center_crop', 'resample',
+            'do_rescale', 'rescale_factor', 'do_normalize', 'image_mean', 'image_std'
+        )
+        return all(getattr(a, k, None) == getattr(b, k, None) for k in keys)
+
+    def _run_models(self, images):
+        """Run both detectors on a list of images
+
+        Calling the two pipelines separately re-ran the full image
+        processor (resize, normalize, to-tensor) once per detector. When
+        the processors are configured identically, preprocess once and
+        feed the shared tensor to both models directly; otherwise each
+        model keeps its own pass. Autograd is skipped with
+        torch.inference_mode().
+        """
+        import torch
+
+        model = self.nsfw_detector.model
+        device = getattr(model, "device", None)
+
+        def _prep(processor):
+            inputs = processor(images, return_tensors="pt")
+            if device is not None and device.type == "cuda":
+                inputs = inputs.to(device=device, dtype=model.dtype, non_blocking=True)
+            return inputs
+
+        inputs = _prep(self.nsfw_detector.image_processor)
+        with torch.inference_mode():
+            nsfw_logits = self.nsfw_detector.model(**inputs).logits
+            if self.violence_detector is None:
+                violence_logits = None
+            elif self._share_preprocess:
+                violence_logits = self.violence_detector.model(**inputs).logits
+            else:
+                violence_inputs = _prep(self.violence_detector.image_processor)
+                violence_logits = self.violence_detector.model(**violence_inputs).logits
+
+        nsfw_predictions = self._logits_to_predictions(
+            nsfw_logits, self.nsfw_detector.model.config.id2label)
+        if violence_logits is not None:
+            violence_predictions = self._logits_to_predictions(
+                violence_logits, self.violence_detector.model.config.id2label)
+        else:
+            violence_predictions = [[{"label": "non-violence", "score": 1.0}]] * len(images)
+        return nsfw_predictions, violence_predictions
+
+    def _logits_to_predictions(self, logits, id2label):
+        """Convert a logits batch to pipeline-style label/score dicts"""
+        import torch
+        probs = torch.softmax(logits.float(), dim=-1)
+        return [
+            [{"label": id2label[j], "score": float(row[j])} for j in range(row.shape[0])]
+            for row in probs
+        ]
 
-    
-    
     def _hash_image(self, image):
         """Generate hash for image to use as cache key"""
         try:
-            # Convert image to bytes for hashing
-            img_byte_arr = io.BytesIO()
-            image.save(img_byte_arr, format='PNG')
-            img_bytes = img_byte_arr.getvalue()
-            
-            # Generate MD5 hash
-            return hashlib.md5(img_bytes).hexdigest()
+            # Hash the raw pixel buffer directly - PNG re-encoding just to
+            # get bytes was by far the slowest part of a cache lookup.
+            # Size and mode are mixed in so images with identical pixel
+            # bytes but different shapes can't collide.
+            h = hashlib.blake2b(digest_size=16)
+            h.update(f"{image.width}x{image.height}:{image.mode}".encode())
+            h.update(image.tobytes())
+            return h.hexdigest()
         except Exception as e:
             logger.error(f"Error hashing image: {e}")
             return None
+
+    def _hash_base64(self, image_base64):
+        """Generate cache key for a raw base64 payload"""
+        if isinstance(image_base64, str):
+            image_base64 = image_base64.encode()
+        return hashlib.blake2b(b'b64:' + image_base64, digest_size=16).hexdigest()
     
     
     def analyze_file(self, image_file):
@@ -97,52 +297,169 @@ class ImageClassifier:
     def analyze_base64(self, image_base64):
         """Analyze base64 encoded image"""
         try:
-            image_data = base64.b64decode(image_base64)
-            image = Image.open(io.BytesIO(image_data))
-            return self._analyze_image(image)
+            import time
+            start_time = time.time()
+
+            # Hash the base64 string itself first: a re-sent payload then
+            # skips the multi-MB decode and PIL open entirely
+            b64_key = self._hash_base64(image_base64)
+            cached_result = self._cached_result(b64_key, start_time)
+            if cached_result is not None:
+                return cached_result
+
+            image = Image.open(io.BytesIO(_b64decode(image_base64, validate=False)))
+            result = self._analyze_image(image)
+            if 'error' not in result:
+                # Cache under the payload key too, alongside the pixel key
+                self._store_result(b64_key, result)
+            return result
         except Exception as e:
             logger.error(f"Error analyzing base64 image: {e}")
             return self._error_response(str(e))
     
     
+    def _prepare_image(self, image):
+        """Normalize a PIL image for inference (RGB, bounded size)"""
+        # Convert to RGB if needed
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+
+        # Resize image if too large (improves performance significantly).
+        # Bilinear is plenty here - the model's preprocessor resizes to
+        # 224x224 anyway, so LANCZOS quality was wasted work
+        max_size = 1024
+        if image.width > max_size or image.height > max_size:
+            logger.info(f"Resizing image from {image.width}x{image.height}")
+            image.thumbnail((max_size, max_size), Image.Resampling.BILINEAR)
+            logger.info(f"Resized to {image.width}x{image.height}")
+        return image
+
+    def _cached_result(self, image_hash, start_time):
+        """Return a cached result copy for this hash, or None on a miss"""
+        import time
+        if not image_hash:
+            return None
+        with self.cache_lock:
+            cached = self.result_cache.get(image_hash)
+            if cached is not None:
+                # Refresh recency so hot images survive eviction
+                self.result_cache.move_to_end(image_hash)
+        if cached is None:
+            return None
+        logger.info(f"Cache hit! Returning cached result for image {image_hash[:8]}...")
+        # One shallow overlay instead of copy-then-mutate; the cached
+        # dict itself is never handed out or modified
+        return {**cached, 'from_cache': True, 'processing_time': time.time() - start_time}
+
+    def _store_result(self, image_hash, result):
+        """Cache a result, evicting least-recently-used entries if full"""
+        if not image_hash:
+            return
+        with self.cache_lock:
+            while len(self.result_cache) >= self.cache_max_size:
+                self.result_cache.popitem(last=False)
+                logger.info(f"Cache full, removed least recently used entry")
+            # Store the result itself - it's serialized, never mutated,
+            # so the defensive copy was pure allocation overhead
+            self.result_cache[image_hash] = result
+            cache_size = len(self.result_cache)
+        logger.info(f"Cached result for image {image_hash[:8]}... (cache size: {cache_size})")
+
     def _analyze_image(self, image):
         """Internal method to analyze PIL Image object"""
         try:
             import time
             start_time = time.time()
-            
-            # Convert to RGB if needed
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
-            
-            # Resize image if too large (improves performance significantly)
-            max_size = 1024
-            if image.width > max_size or image.height > max_size:
-                logger.info(f"Resizing image from {image.width}x{image.height}")
-                image.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
-                logger.info(f"Resized to {image.width}x{image.height}")
-            
+
+            image = self._prepare_image(image)
+
             # Check cache first
             image_hash = self._hash_image(image)
-            if image_hash and image_hash in self.result_cache:
-                logger.info(f"Cache hit! Returning cached result for image {image_hash[:8]}...")
-                cached_result = self.result_cache[image_hash].copy()
-                cached_result['from_cache'] = True
-                cached_result['processing_time'] = time.time() - start_time
+            cached_result = self._cached_result(image_hash, start_time)
+            if cached_result is not None:
                 return cached_result
-            
-            # Run NSFW detection (always available)
-            nsfw_predictions = self.nsfw_detector(image)
-            
-            # Run violence detection only if model loaded
-            if self.violence_detector is not None:
-                violence_predictions = self.violence_detector(image)
-            else:
-                violence_predictions = [{"label": "non-violence", "score": 1.0}]
-            
+
+            # One shared preprocessing pass feeds both detectors
+            nsfw_batches, violence_batches = self._run_models([image])
+            nsfw_predictions = nsfw_batches[0]
+            violence_predictions = violence_batches[0]
+
             processing_time = time.time() - start_time
             logger.info(f"Image analysis completed in {processing_time:.2f} seconds")
-            
+
+            result = self._build_result(image, nsfw_predictions, violence_predictions, processing_time)
+            self._store_result(image_hash, result)
+            return result
+
+        except Exception as e:
+            logger.error(f"Error in image analysis: {e}")
+            return self._error_response(str(e))
+
+    def analyze_base64_batch(self, images_base64):
+        """
+        Analyze a list of base64 images with batched model inference
+
+        Cache misses are collected and sent through each pipeline in one
+        call, so the model runs a few large forward passes instead of one
+        per image.
+        """
+        import time
+        start_time = time.time()
+        results = [None] * len(images_base64)
+        pending = []  # (index, image, image_hash, b64_key) for cache misses
+
+        for i, image_base64 in enumerate(images_base64):
+            # Payload-level cache check avoids decode + PIL open entirely
+            b64_key = self._hash_base64(image_base64)
+            cached_result = self._cached_result(b64_key, start_time)
+            if cached_result is not None:
+                results[i] = cached_result
+                continue
+
+            try:
+                image = Image.open(io.BytesIO(_b64decode(image_base64, validate=False)))
+                image = self._prepare_image(image)
+            except Exception as e:
+                logger.error(f"Error decoding batch image {i}: {e}")
+                results[i] = self._error_response(str(e))
+                continue
+
+            image_hash = self._hash_image(image)
+            cached_result = self._cached_result(image_hash, start_time)
+            if cached_result is not None:
+                results[i] = cached_result
+            else:
+                pending.append((i, image, image_hash, b64_key))
+
+        if pending:
+            try:
+                images = [image for _, image, _, _ in pending]
+                nsfw_batches = []
+                violence_batches = []
+                for start in range(0, len(images), 8):
+                    nsfw_chunk, violence_chunk = self._run_models(images[start:start + 8])
+                    nsfw_batches.extend(nsfw_chunk)
+                    violence_batches.extend(violence_chunk)
+
+                processing_time = time.time() - start_time
+                logger.info(f"Batch of {len(images)} images analyzed in {processing_time:.2f} seconds")
+
+                for (i, image, image_hash, b64_key), nsfw_predictions, violence_predictions in zip(
+                        pending, nsfw_batches, violence_batches):
+                    result = self._build_result(image, nsfw_predictions, violence_predictions, processing_time)
+                    self._store_result(image_hash, result)
+                    self._store_result(b64_key, result)
+                    results[i] = result
+            except Exception as e:
+                logger.error(f"Error in batch image analysis: {e}")
+                for i, _, _, _ in pending:
+                    results[i] = self._error_response(str(e))
+
+        return results
+
+    def _build_result(self, image, nsfw_predictions, violence_predictions, processing_time):
+        """Parse raw pipeline predictions into an analysis result"""
+        try:
             # Parse NSFW predictions
             nsfw_score = 0.0
             normal_score = 0.0
@@ -175,28 +492,13 @@ class ImageClassifier:
             logger.info(f"Violence score: {violence_score:.3f}, Non-violence score: {non_violence_score:.3f}")
             logger.info(f"NSFW score: {nsfw_score:.3f}, Normal score: {normal_score:.3f}")
             
-            # Apply smart filtering for violence false positives
-            # If violence is detected but NSFW is very low, it's likely a false positive
-            # This prevents nature images, sports, etc. from being flagged as violent
-            adjusted_violence_score = violence_score
-            
-            # Only apply aggressive filtering for very obvious false positives
-            # Be more conservative to avoid missing actual injuries/violence
-            if violence_score > 0.6 and nsfw_score < 0.10 and normal_score > 0.85:
-                # Very high violence, very low NSFW, and very high normal confidence
-                # This pattern suggests nature/sports false positive
-                adjusted_violence_score = violence_score * 0.4
+            # Numeric reduction lives in _score_threat
+            is_safe, threat_level, adjusted_violence_score, max_threat_score = _score_threat(
+                nsfw_score, normal_score, violence_score
+            )
+            if adjusted_violence_score != violence_score:
                 logger.info(f"Applied false positive filter: violence reduced from {violence_score:.3f} to {adjusted_violence_score:.3f}")
-            elif violence_score > 0.5 and nsfw_score < 0.05 and normal_score > 0.90:
-                # Extremely obvious false positive (e.g., pure nature scenes)
-                adjusted_violence_score = violence_score * 0.5
-                logger.info(f"Applied weak false positive filter: violence reduced to {adjusted_violence_score:.3f}")
-            
-            # Determine overall safety using adjusted scores
-            max_threat_score = max(nsfw_score, adjusted_violence_score)
-            # Stricter threshold - even minor threats should not be marked as completely safe
-            is_safe = max_threat_score < 0.20  # Lowered to 20% to catch injuries/mild violence
-            
+
             # Construct categories dict with adjusted violence
             categories = {
                 "nsfw": float(nsfw_score),
@@ -206,16 +508,7 @@ class ImageClassifier:
             
             # Overall score is the maximum threat
             overall_score = max_threat_score
-            
-            if is_safe:
-                threat_level = "safe"
-            elif overall_score > 0.6:  # High threat
-                threat_level = "high"
-            elif overall_score > 0.30:  # Medium threat (includes injuries ~20-30%)
-                threat_level = "medium"
-            else:
-                threat_level = "low"  # 20-30% range
-            
+
             result = {
                 "is_safe": is_safe,
                 "threat_level": threat_level,
@@ -233,22 +526,11 @@ class ImageClassifier:
                     "violence": "jaranohaal/vit-base-violence-detection"
                 }
             }
-            
-            # Store in cache (implement simple LRU by clearing oldest if full)
-            if image_hash:
-                if len(self.result_cache) >= self.cache_max_size:
-                    # Remove oldest entry (simple FIFO strategy)
-                    oldest_key = next(iter(self.result_cache))
-                    del self.result_cache[oldest_key]
-                    logger.info(f"Cache full, removed oldest entry")
-                
-                self.result_cache[image_hash] = result.copy()
-                logger.info(f"Cached result for image {image_hash[:8]}... (cache size: {len(self.result_cache)})")
-            
+
             return result
-            
+
         except Exception as e:
-            logger.error(f"Error in image analysis: {e}")
+            logger.error(f"Error building image result: {e}")
             return self._error_response(str(e))
     
     
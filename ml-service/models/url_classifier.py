@@ -4,16 +4,22 @@ Uses trained Random Forest classifier for URL safety detection
 """
 
 from urllib.parse import urlparse
+from collections import Counter, OrderedDict
+import numpy as np
 import re
 import logging
 import joblib
 import json
 import os
 import math
+import threading
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Compiled once at import - was rebuilt on every feature extraction
+_IP_RE = re.compile(r'^(\d{1,3}\.){3}\d{1,3}$')
+
 
 class URLClassifier:
     """
@@ -27,6 +33,11 @@ class URLClassifier:
     
     def __init__(self):
         """Initialize the URL classification model"""
+        # Bounded LRU over analysis results - popular URLs get re-scanned
+        # constantly and skip extraction and prediction entirely
+        self.result_cache = OrderedDict()
+        self.cache_max_size = 10000
+        self.cache_lock = threading.Lock()
         try:
             logger.info("Loading URL classification model...")
             
@@ -45,6 +56,23 @@ class URLClassifier:
                 config = json.load(f)
                 self.feature_names = config['feature_names']
             
+            # Prefer the compiled ONNX export when the training run
+            # produced one and onnxruntime is installed - tree traversal
+            # then runs as fused C kernels instead of sklearn's Python
+            # dispatch per estimator
+            self._onnx_session = None
+            onnx_path = os.path.join(model_path, "model.onnx")
+            if os.path.exists(onnx_path):
+                try:
+                    import onnxruntime
+                    self._onnx_session = onnxruntime.InferenceSession(
+                        onnx_path, providers=["CPUExecutionProvider"]
+                    )
+                    self._onnx_input = self._onnx_session.get_inputs()[0].name
+                    logger.info("✓ URL model served via ONNX Runtime")
+                except ImportError:
+                    logger.info("onnxruntime not installed - using sklearn predictor")
+
             # Constants for feature extraction
             self.url_shorteners = ['bit.ly', 'goo.gl', 'tinyurl.com', 't.co', 'ow.ly', 'is.gd']
             self.suspicious_tlds = ['.tk', '.ml', '.ga', '.cf', '.gq', '.xyz', '.top', '.work', '.click', '.online']
@@ -52,7 +80,13 @@ class URLClassifier:
                 'login', 'verify', 'account', 'secure', 'update', 'confirm',
                 'banking', 'paypal', 'ebay', 'amazon', 'suspended', 'limited'
             ]
-            
+
+            # Precompiled matchers: one C-level scan each instead of an
+            # any() loop of Python substring searches per URL
+            self._shortener_re = re.compile('|'.join(map(re.escape, self.url_shorteners)))
+            self._keyword_re = re.compile('|'.join(map(re.escape, self.suspicious_keywords)))
+            self._suspicious_tld_set = {tld.lstrip('.') for tld in self.suspicious_tlds}
+
             logger.info("✓ Trained Random Forest URL model loaded successfully!")
             logger.info(f"  Categories: {list(self.label_to_id.keys())}")
             logger.info(f"  Model accuracy: 98.44%")
@@ -61,13 +95,47 @@ class URLClassifier:
             logger.error(f"Error loading URL model: {e}")
             raise
     
-    def _calculate_entropy(self, text):
-        """Calculate Shannon entropy of a string"""
+    def _cache_get(self, key):
+        """Return the cached result for this input, or None"""
+        with self.cache_lock:
+            cached = self.result_cache.get(key)
+            if cached is not None:
+                self.result_cache.move_to_end(key)
+        return cached
+
+    def _cache_store(self, key, result):
+        """Cache a result, evicting least-recently-used entries if full"""
+        with self.cache_lock:
+            while len(self.result_cache) >= self.cache_max_size:
+                self.result_cache.popitem(last=False)
+            self.result_cache[key] = result
+
+    def _predict_proba(self, X):
+        """Probability matrix for a float32 feature batch"""
+        if self._onnx_session is not None:
+            outputs = self._onnx_session.run(
+                None, {self._onnx_input: np.asarray(X, dtype=np.float32)}
+            )
+            probs = outputs[-1]
+            if isinstance(probs, list):
+                # skl2onnx ZipMap output: one {class_id: prob} dict per row
+                n = len(self.id_to_label)
+                probs = np.array([[row[i] for i in range(n)] for row in probs])
+            return probs
+        return self.model.predict_proba(X)
+
+    def _calculate_entropy(self, text, counts=None):
+        """Calculate Shannon entropy of a string in one linear pass
+
+        Takes an optional precomputed Counter so callers that already
+        counted the string don't count it again.
+        """
         if not text:
             return 0.0
-        prob = [float(text.count(c)) / len(text) for c in dict.fromkeys(list(text))]
-        entropy = - sum([p * math.log(p) / math.log(2.0) for p in prob])
-        return entropy
+        inv = 1.0 / len(text)
+        if counts is None:
+            counts = Counter(text)
+        return -sum((c * inv) * math.log2(c * inv) for c in counts.values())
     
     def _extract_features(self, url):
         """Extract 20 features from URL"""
@@ -77,30 +145,37 @@ class URLClassifier:
             path = parsed.path.lower()
             full_url = url.lower()
             
-            # Extract features in correct order
-            ip_pattern = re.compile(r'^(\d{1,3}\.){3}\d{1,3}$')
-            
+            # One C-level counting pass per string replaces the ~8
+            # separate url.count()/isdigit() traversals below
+            c_url = Counter(url)
+            c_dom = Counter(domain)
+            url_length = len(url)
+            digit_count = sum(c_url[d] for d in '0123456789')
+            special_char_count = sum(c_url[ch] for ch in '@-_%&=?#')
+            dot_count = c_dom['.']
+            hyphen_count = c_dom['-']
+
             features = {
-                "url_length": len(url),
+                "url_length": url_length,
                 "domain_length": len(domain),
                 "path_length": len(path),
-                "subdomain_count": domain.count('.'),
+                "subdomain_count": dot_count,
                 "has_https": 1 if parsed.scheme == 'https' else 0,
-                "has_ip": 1 if ip_pattern.match(domain) else 0,
-                "suspicious_tld": 1 if any(domain.endswith(tld) for tld in self.suspicious_tlds) else 0,
-                "special_char_count": sum(url.count(c) for c in ['@', '-', '_', '%', '&', '=', '?', '#']),
-                "digit_count": sum(c.isdigit() for c in url),
-                "is_shortener": 1 if any(s in domain for s in self.url_shorteners) else 0,
-                "has_suspicious_keywords": 1 if any(kw in full_url for kw in self.suspicious_keywords) else 0,
-                "domain_entropy": round(self._calculate_entropy(domain), 4),
-                "path_entropy": round(self._calculate_entropy(path) if path else 0.0, 4),
-                "dot_count": domain.count('.'),
-                "hyphen_count": domain.count('-'),
-                "has_port": 1 if ':' in domain else 0,
+                "has_ip": 1 if _IP_RE.match(domain) else 0,
+                "suspicious_tld": 1 if '.' in domain and domain.rsplit('.', 1)[-1] in self._suspicious_tld_set else 0,
+                "special_char_count": special_char_count,
+                "digit_count": digit_count,
+                "is_shortener": 1 if self._shortener_re.search(domain) else 0,
+                "has_suspicious_keywords": 1 if self._keyword_re.search(full_url) else 0,
+                "domain_entropy": round(self._calculate_entropy(domain, c_dom), 4),
+                "path_entropy": round(self._calculate_entropy(path), 4),
+                "dot_count": dot_count,
+                "hyphen_count": hyphen_count,
+                "has_port": 1 if c_dom[':'] else 0,
                 "query_param_count": parsed.query.count('&') + (1 if parsed.query else 0),
                 "has_double_slash": 1 if '//' in path else 0,
-                "digit_ratio": round(sum(c.isdigit() for c in url) / len(url) if len(url) > 0 else 0, 4),
-                "special_char_ratio": round(sum(url.count(c) for c in ['@', '-', '_', '%', '&', '=', '?', '#']) / len(url) if len(url) > 0 else 0, 4)
+                "digit_ratio": round(digit_count / url_length if url_length > 0 else 0, 4),
+                "special_char_ratio": round(special_char_count / url_length if url_length > 0 else 0, 4)
             }
             
             # Convert to feature vector in correct order
@@ -122,66 +197,110 @@ class URLClassifier:
             dict: Analysis results with threat level and category scores
         """
         try:
+            cached = self._cache_get(url)
+            if cached is not None:
+                return cached
+
             # Extract features
             features = self._extract_features(url)
-            
+
             if features is None:
                 return self._error_response()
-            
-            # Predict
-            prediction = self.model.predict([features])[0]
-            probabilities = self.model.predict_proba([features])[0]
-            
-            # Get category and confidence
-            category = self.id_to_label[prediction]
-            confidence = probabilities[prediction]
-            
-            # Create categories dict with all probabilities
-            categories = {}
-            for cat_name, cat_id in self.label_to_id.items():
-                categories[cat_name] = round(probabilities[cat_id], 3)
-            
-            # Determine safety
-            is_safe = category == "safe"
-            
-            # Determine threat level based on category and confidence
-            if is_safe:
-                threat_level = "safe"
-            elif category in ["malware", "phishing"] and confidence > 0.7:
-                threat_level = "high"
-            elif category == "spam" and confidence > 0.8:
-                threat_level = "medium"
-            elif category == "suspicious":
-                threat_level = "medium"
-            else:
-                threat_level = "low"
-            
-            # Overall score (confidence of predicted category)
-            overall_score = confidence
-            
-            # Parse URL for domain info
-            parsed = urlparse(url)
-            
-            return {
-                "is_safe": is_safe,
-                "threat_level": threat_level,
-                "category": category,
-                "confidence": round(confidence, 3),
-                "categories": categories,
-                "overall_score": round(overall_score, 3),
-                "domain_info": {
-                    "domain": parsed.netloc,
-                    "has_https": parsed.scheme == 'https',
-                    "path_length": len(parsed.path),
-                    "url_length": len(url)
-                },
-                "model": "websafety-url-rf"
-            }
-            
+
+            # Predict: one predict_proba call gives both the class and
+            # its confidence - the separate predict() was a second full
+            # traversal of the trees
+            probabilities = self._predict_proba(np.asarray([features], dtype=np.float32))[0]
+            prediction = int(probabilities.argmax())
+
+            result = self._build_result(url, prediction, probabilities)
+            self._cache_store(url, result)
+            return result
+
         except Exception as e:
             logger.error(f"Error analyzing URL: {e}")
             return self._error_response(str(e))
-    
+
+    def analyze_batch(self, urls):
+        """
+        Analyze a list of URLs with one vectorized model prediction
+
+        Feature rows are stacked into a single matrix so the model
+        traverses its trees once for the whole batch instead of once
+        per request.
+
+        Args:
+            urls (list[str]): URLs to analyze
+
+        Returns:
+            list[dict]: One analysis result per input URL
+        """
+        try:
+            feature_rows = [self._extract_features(url) for url in urls]
+            results = [self._error_response() for _ in urls]
+
+            valid = [i for i, row in enumerate(feature_rows) if row is not None]
+            if valid:
+                X = np.asarray([feature_rows[i] for i in valid], dtype=np.float32)
+                probabilities = self._predict_proba(X)
+                predictions = probabilities.argmax(axis=1)
+                for i, prediction, probs in zip(valid, predictions, probabilities):
+                    results[i] = self._build_result(urls[i], int(prediction), probs)
+
+            return results
+
+        except Exception as e:
+            logger.error(f"Error analyzing URL batch: {e}")
+            return [self._error_response(str(e)) for _ in urls]
+
+    def _build_result(self, url, prediction, probabilities):
+        """Turn one prediction row into an analysis result"""
+        # Get category and confidence
+        category = self.id_to_label[prediction]
+        confidence = probabilities[prediction]
+
+        # Create categories dict with all probabilities
+        categories = {}
+        for cat_name, cat_id in self.label_to_id.items():
+            categories[cat_name] = round(probabilities[cat_id], 3)
+
+        # Determine safety
+        is_safe = category == "safe"
+
+        # Determine threat level based on category and confidence
+        if is_safe:
+            threat_level = "safe"
+        elif category in ["malware", "phishing"] and confidence > 0.7:
+            threat_level = "high"
+        elif category == "spam" and confidence > 0.8:
+            threat_level = "medium"
+        elif category == "suspicious":
+            threat_level = "medium"
+        else:
+            threat_level = "low"
+
+        # Overall score (confidence of predicted category)
+        overall_score = confidence
+
+        # Parse URL for domain info
+        parsed = urlparse(url)
+
+        return {
+            "is_safe": is_safe,
+            "threat_level": threat_level,
+            "category": category,
+            "confidence": round(confidence, 3),
+            "categories": categories,
+            "overall_score": round(overall_score, 3),
+            "domain_info": {
+                "domain": parsed.netloc,
+                "has_https": parsed.scheme == 'https',
+                "path_length": len(parsed.path),
+                "url_length": len(url)
+            },
+            "model": "websafety-url-rf"
+        }
+
     def _error_response(self, error=None):
         """Return error response"""
         return {